@@ -5,9 +5,178 @@ Configuration and User Input Module for Gmail IMAP Cleaner
 Handles user input, configuration validation, and authentication guidance.
 """
 
-import getpass
+import os
+import sys
 import datetime
-import logging
+from types import MappingProxyType
+
+from enhanced_config import _get_enhanced_config
+
+
+_MONTHS = frozenset({'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+                     'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'})
+
+_GMAIL_DOMAINS = frozenset({'gmail.com', 'googlemail.com'})
+
+_OPERATION_CHOICES = frozenset({'delete', 'unsub', 'dry', 'fast'})
+
+# Defaults for keys omitted from the ZEROMAIL_CONFIG environment variable
+_ENV_CONFIG_DEFAULTS = MappingProxyType({
+    'folders': ('INBOX',),
+    'delete_old': False,
+    'process_unsubscribe': False,
+    'dry_run': True,
+    'fast_mode': False,
+})
+
+# Set once the full authentication help has been printed this session
+_auth_help_shown = False
+
+
+def _cached_list_folders(imap_conn):
+    """
+    Return the folder list for a connection, issuing IMAP LIST only once.
+    
+    The listing is kept on the connection itself, which drops it whenever it
+    connects, reconnects or disconnects.
+    
+    Args:
+        imap_conn: IMAP connection object
+        
+    Returns:
+        list: List of folder names
+    """
+    folders = getattr(imap_conn, 'folder_listing', None)
+    if folders is None:
+        folders = imap_conn.list_folders()
+        # A failed LIST comes back empty; leave that uncached so it is retried
+        if folders:
+            imap_conn.folder_listing = folders
+    return folders
+
+
+_AUTH_HELP_TEXT = """
+======================================================================
+GMAIL AUTHENTICATION SETUP REQUIRED
+======================================================================
+Gmail requires an App Password for IMAP access. Here's how to set it up:
+
+1. Enable 2-Factor Authentication on your Gmail account:
+   - Go to: https://myaccount.google.com/security
+   - Turn on 2-Step Verification
+
+2. Generate an App Password:
+   - Go to: https://myaccount.google.com/apppasswords
+   - Select 'Mail' and your device
+   - Copy the 16-character password (remove spaces)
+
+3. Use the App Password (not your regular Gmail password)
+   - The app password looks like: abcd efgh ijkl mnop
+   - Enter it as: abcdefghijklmnop (no spaces)
+
+4. Alternative: Enable 'Less Secure Apps' (not recommended)
+   - Go to: https://myaccount.google.com/lesssecureapps
+   - Turn on 'Allow less secure apps'
+
+For more help: https://support.google.com/accounts/answer/185833
+======================================================================
+"""
+
+# Common Gmail folder name variations
+_GMAIL_FOLDER_VARIANTS = {
+    'all_mail': ('[Gmail]/All Mail', '[Google Mail]/All Mail', 'All Mail'),
+    'trash': ('[Gmail]/Trash', '[Google Mail]/Bin', '[Gmail]/Bin', 'Trash'),
+    'spam': ('[Gmail]/Spam', '[Google Mail]/Spam', 'Spam'),
+    'sent': ('[Gmail]/Sent Mail', '[Google Mail]/Sent Mail', 'Sent'),
+    'drafts': ('[Gmail]/Drafts', '[Google Mail]/Drafts', 'Drafts')
+}
+
+# Reverse index: variant name -> (folder type, preference rank)
+_VARIANT_TO_TYPE = {
+    variant: (folder_type, rank)
+    for folder_type, variants in _GMAIL_FOLDER_VARIANTS.items()
+    for rank, variant in enumerate(variants)
+}
+
+# Numbered menu options: (choice, folder type, default folder name)
+_FOLDER_MENU_OPTIONS = (
+    ('1', None, 'INBOX'),
+    ('2', 'all_mail', '[Gmail]/All Mail'),
+    ('3', 'trash', '[Gmail]/Trash'),
+    ('4', 'spam', '[Gmail]/Spam'),
+    ('5', 'sent', '[Gmail]/Sent Mail'),
+)
+
+
+def _build_folder_map(actual_folders):
+    """
+    Resolve the numbered menu options to folder names.
+    
+    Args:
+        actual_folders (dict): Discovered folder names keyed by folder type
+        
+    Returns:
+        dict: Folder name keyed by menu choice
+    """
+    return {
+        choice: actual_folders.get(folder_type, default)
+        for choice, folder_type, default in _FOLDER_MENU_OPTIONS
+    }
+
+
+# Requested-name aliases and the substring looked for in available folders
+_MATCH_RULES = (
+    (frozenset({'bin', 'trash'}), 'bin'),
+    (frozenset({'all mail', 'allmail'}), 'all mail'),
+    (frozenset({'spam'}), 'spam'),
+    (frozenset({'sent', 'sent mail'}), 'sent'),
+)
+
+# Flattened alias -> substring table built once from _MATCH_RULES
+_MATCH_NEEDLES = {alias: needle for aliases, needle in _MATCH_RULES for alias in aliases}
+
+
+def _first_char(text):
+    """
+    Return the first non-whitespace character of a string, lowercased.
+    
+    Args:
+        text (str): Raw user input
+        
+    Returns:
+        str: Lowercased first non-blank character, or '' if there is none
+    """
+    for char in text:
+        if not char.isspace():
+            return char.lower()
+    return ''
+
+
+def _ask_yes(prompt):
+    """
+    Ask a yes/no question, looking only at the first non-blank character.
+    
+    Args:
+        prompt (str): Question shown to the user
+        
+    Returns:
+        bool: True if the answer starts with 'y' or 'Y'
+    """
+    return _first_char(input(prompt)) == 'y'
+
+
+def validate_gmail_address(email):
+    """
+    Validate that an address is a single-@ Gmail or Googlemail address.
+    
+    Args:
+        email (str): Email address to validate
+        
+    Returns:
+        bool: True if the address is a valid Gmail address, False otherwise
+    """
+    local, sep, domain = email.rpartition('@')
+    return bool(sep and local) and '@' not in local and domain in _GMAIL_DOMAINS
 
 
 def validate_date_format(date_string):
@@ -20,6 +189,16 @@ def validate_date_format(date_string):
     Returns:
         bool: True if format is valid, False otherwise
     """
+    # Cheap structural check before handing off to strptime
+    parts = date_string.split('-')
+    if len(parts) != 3:
+        return False
+    day, month, year = parts
+    if not (len(day) in (1, 2) and day.isdigit() and month.title() in _MONTHS
+            and len(year) == 4 and year.isdigit()):
+        return False
+    
+    # strptime still rejects days past the end of the month
     try:
         datetime.datetime.strptime(date_string, "%d-%b-%Y")
         return True
@@ -27,34 +206,41 @@ def validate_date_format(date_string):
         return False
 
 
+# Per-field validators and the message shown when a field fails
+_CONFIG_SCHEMA = {
+    'email': (str, validate_gmail_address, "Please enter a valid Gmail address (must end with @gmail.com)"),
+    'password': (str, bool, "Password cannot be empty."),
+    'cutoff_date': (str, validate_date_format, "Please enter date in DD-MMM-YYYY format (e.g., 01-Jul-2023)."),
+    'folders': (list, lambda folders: bool(folders) and all(isinstance(f, str) and f for f in folders),
+                "At least one folder must be selected (a list of folder names)."),
+}
+
+
+def _validate_config(config):
+    """
+    Validate a configuration dictionary against the schema in one pass.
+    
+    Args:
+        config (dict): Configuration values to check
+        
+    Returns:
+        list: (field, message) pairs for every invalid field
+    """
+    # Values from JSON can be of any type; check it before the validator sees them
+    return [
+        (field, message)
+        for field, (expected_type, validator, message) in _CONFIG_SCHEMA.items()
+        if not isinstance(config.get(field), expected_type) or not validator(config[field])
+    ]
+
+
 def show_authentication_help():
     """
     Display helpful information about Gmail authentication requirements.
     """
-    print("\n" + "=" * 70)
-    print("GMAIL AUTHENTICATION SETUP REQUIRED")
-    print("=" * 70)
-    print("Gmail requires an App Password for IMAP access. Here's how to set it up:")
-    print()
-    print("1. Enable 2-Factor Authentication on your Gmail account:")
-    print("   - Go to: https://myaccount.google.com/security")
-    print("   - Turn on 2-Step Verification")
-    print()
-    print("2. Generate an App Password:")
-    print("   - Go to: https://myaccount.google.com/apppasswords")
-    print("   - Select 'Mail' and your device")
-    print("   - Copy the 16-character password (remove spaces)")
-    print()
-    print("3. Use the App Password (not your regular Gmail password)")
-    print("   - The app password looks like: abcd efgh ijkl mnop")
-    print("   - Enter it as: abcdefghijklmnop (no spaces)")
-    print()
-    print("4. Alternative: Enable 'Less Secure Apps' (not recommended)")
-    print("   - Go to: https://myaccount.google.com/lesssecureapps")
-    print("   - Turn on 'Allow less secure apps'")
-    print()
-    print("For more help: https://support.google.com/accounts/answer/185833")
-    print("=" * 70)
+    global _auth_help_shown
+    sys.stdout.write(_AUTH_HELP_TEXT)
+    _auth_help_shown = True
 
 
 def get_folder_selection(imap_conn=None):
@@ -67,141 +253,250 @@ def get_folder_selection(imap_conn=None):
     Returns:
         list: List of selected folder names
     """
-    # Common Gmail folder name variations
-    gmail_folders = {
-        'all_mail': ['[Gmail]/All Mail', '[Google Mail]/All Mail', 'All Mail'],
-        'trash': ['[Gmail]/Trash', '[Google Mail]/Bin', '[Gmail]/Bin', 'Trash'],
-        'spam': ['[Gmail]/Spam', '[Google Mail]/Spam', 'Spam'],
-        'sent': ['[Gmail]/Sent Mail', '[Google Mail]/Sent Mail', 'Sent'],
-        'drafts': ['[Gmail]/Drafts', '[Google Mail]/Drafts', 'Drafts']
-    }
-    
     # Try to discover actual folder names if connection is available
     actual_folders = {}
     if imap_conn:
+        import logging
         try:
-            available_folders = imap_conn.list_folders()
+            available_folders = _cached_list_folders(imap_conn)
             logging.info(f"Available folders: {available_folders}")
             
-            # Map common names to actual folder names
-            for folder_type, possible_names in gmail_folders.items():
-                for possible_name in possible_names:
-                    if possible_name in available_folders:
-                        actual_folders[folder_type] = possible_name
-                        break
+            # Map common names to actual folder names in a single pass,
+            # preferring earlier variants when several are present
+            best_rank = {}
+            for available_folder in available_folders:
+                entry = _VARIANT_TO_TYPE.get(available_folder)
+                if entry is None:
+                    continue
+                folder_type, rank = entry
+                if rank < best_rank.get(folder_type, len(_GMAIL_FOLDER_VARIANTS[folder_type])):
+                    best_rank[folder_type] = rank
+                    actual_folders[folder_type] = available_folder
         except Exception as e:
             logging.warning(f"Could not discover folder names: {e}")
     
-    print("\nSelect Gmail folders/labels to process:")
-    print("1. INBOX (Primary inbox)")
-    print(f"2. All Mail (All emails including archived) - {actual_folders.get('all_mail', '[Gmail]/All Mail')}")
-    print(f"3. Trash (Deleted emails) - {actual_folders.get('trash', '[Gmail]/Trash')}")
-    print(f"4. Spam (Spam emails) - {actual_folders.get('spam', '[Gmail]/Spam')}")
-    print(f"5. Sent Mail (Sent emails) - {actual_folders.get('sent', '[Gmail]/Sent Mail')}")
-    print("6. List all available folders")
-    print("7. Custom folder/label")
-    print("8. Multiple folders")
+    folder_map = _build_folder_map(actual_folders)
+    
+    menu_text = (
+        "\nSelect Gmail folders/labels to process:\n"
+        "1. INBOX (Primary inbox)\n"
+        f"2. All Mail (All emails including archived) - {folder_map['2']}\n"
+        f"3. Trash (Deleted emails) - {folder_map['3']}\n"
+        f"4. Spam (Spam emails) - {folder_map['4']}\n"
+        f"5. Sent Mail (Sent emails) - {folder_map['5']}\n"
+        "6. List all available folders\n"
+        "7. Custom folder/label\n"
+        "8. Multiple folders\n"
+    )
+    show_menu = True
     
     while True:
+        if show_menu:
+            sys.stdout.write(menu_text)
+            show_menu = False
+        
         choice = input("\nEnter your choice (1-8): ").strip()
         
-        if choice == '1':
-            return ['INBOX']
-        elif choice == '2':
-            folder_name = actual_folders.get('all_mail', '[Gmail]/All Mail')
-            print(f"\n⚠ WARNING: Gmail All Mail Behavior")
-            print(f"⚠ Deleting from All Mail only removes the 'All Mail' label.")
-            print(f"⚠ Emails may still exist in INBOX, Sent, and other folders.")
-            print(f"⚠ For complete deletion, consider processing individual folders.")
-            print(f"⚠ Continue with All Mail? (y/n): ", end="")
-            confirm = input().strip().lower()
-            if confirm not in ['y', 'yes']:
-                print("Returning to folder selection...")
-                return get_folder_selection(imap_connection)
-            return [folder_name]
-        elif choice == '3':
-            folder_name = actual_folders.get('trash', '[Gmail]/Trash')
-            return [folder_name]
-        elif choice == '4':
-            folder_name = actual_folders.get('spam', '[Gmail]/Spam')
-            return [folder_name]
-        elif choice == '5':
-            folder_name = actual_folders.get('sent', '[Gmail]/Sent Mail')
-            return [folder_name]
-        elif choice == '6':
-            if imap_conn:
-                try:
-                    folders = imap_conn.list_folders()
-                    print("\nAvailable folders:")
-                    for i, folder in enumerate(folders, 1):
-                        print(f"{i:2d}. {folder}")
-                    
-                    folder_choice = input("\nEnter folder number or name: ").strip()
-                    try:
-                        folder_index = int(folder_choice) - 1
-                        if 0 <= folder_index < len(folders):
-                            return [folders[folder_index]]
-                        else:
-                            print("Invalid folder number.")
-                    except ValueError:
-                        if folder_choice in folders:
-                            return [folder_choice]
-                        else:
-                            print("Folder not found.")
-                except Exception as e:
-                    print(f"Error listing folders: {e}")
-            else:
-                print("Cannot list folders - no connection available yet.")
-                print("Folders will be validated after connecting to Gmail.")
-                print("Common Gmail folders you can try:")
-                print("  - INBOX")
-                print("  - [Gmail]/All Mail")
-                print("  - [Gmail]/Bin (Trash)")
-                print("  - [Gmail]/Spam")
-                print("  - [Gmail]/Sent Mail")
-                print("  - [Gmail]/Drafts")
-                
-                custom_folder = input("\nEnter folder name to try: ").strip()
-                if custom_folder:
-                    return [custom_folder]
-                else:
-                    print("No folder entered.")
-        elif choice == '7':
-            custom_folder = input("Enter custom folder/label name: ").strip()
-            if custom_folder:
-                return [custom_folder]
-            else:
-                print("Folder name cannot be empty.")
-        elif choice == '8':
-            folders = []
-            print("\nSelect multiple folders (enter numbers separated by commas, e.g., 1,2,4):")
-            print("Available options: 1=INBOX, 2=All Mail, 3=Trash, 4=Spam, 5=Sent Mail")
+        handler = _FOLDER_CHOICE_HANDLERS.get(choice)
+        if handler is None:
+            print("Please enter a number between 1-8.")
+            continue
+        
+        result = handler(folder_map, imap_conn)
+        if result is _SHOW_MENU:
+            show_menu = True
+        elif result is not None:
+            return result
+
+
+# Returned by a menu handler to redisplay the folder menu
+_SHOW_MENU = object()
+
+
+def _choose_mapped_folder(choice):
+    """Build a handler that returns the folder mapped to a numbered choice."""
+    def handler(folder_map, imap_conn):
+        return [folder_map[choice]]
+    return handler
+
+
+def _choose_all_mail(folder_map, imap_conn):
+    """Handle menu choice 2: All Mail, after warning about label semantics."""
+    print(f"\n⚠ WARNING: Gmail All Mail Behavior")
+    print(f"⚠ Deleting from All Mail only removes the 'All Mail' label.")
+    print(f"⚠ Emails may still exist in INBOX, Sent, and other folders.")
+    print(f"⚠ For complete deletion, consider processing individual folders.")
+    if not _ask_yes("⚠ Continue with All Mail? (y/n): "):
+        print("Returning to folder selection...")
+        return _SHOW_MENU
+    return [folder_map['2']]
+
+
+def _choose_listed_folder(folder_map, imap_conn):
+    """Handle menu choice 6: pick from the account's folder list."""
+    if imap_conn:
+        try:
+            folders = _cached_list_folders(imap_conn)
+            print("\nAvailable folders:")
+            for i, folder in enumerate(folders, 1):
+                print(f"{i:2d}. {folder}")
             
-            selections = input("Enter selections: ").strip()
+            folder_choice = input("\nEnter folder number or name: ").strip()
             try:
-                folder_map = {
-                    '1': 'INBOX',
-                    '2': actual_folders.get('all_mail', '[Gmail]/All Mail'),
-                    '3': actual_folders.get('trash', '[Gmail]/Trash'),
-                    '4': actual_folders.get('spam', '[Gmail]/Spam'),
-                    '5': actual_folders.get('sent', '[Gmail]/Sent Mail')
-                }
-                
-                for sel in selections.split(','):
-                    sel = sel.strip()
-                    if sel in folder_map:
-                        folders.append(folder_map[sel])
-                    else:
-                        print(f"Invalid selection: {sel}")
-                
-                if folders:
-                    return folders
+                folder_index = int(folder_choice) - 1
+                if 0 <= folder_index < len(folders):
+                    return [folders[folder_index]]
                 else:
-                    print("No valid folders selected.")
-            except:
-                print("Invalid input format.")
+                    print("Invalid folder number.")
+            except ValueError:
+                if folder_choice in folders:
+                    return [folder_choice]
+                else:
+                    print("Folder not found.")
+        except Exception as e:
+            print(f"Error listing folders: {e}")
+    else:
+        print("Cannot list folders - no connection available yet.")
+        print("Folders will be validated after connecting to Gmail.")
+        print("Common Gmail folders you can try:")
+        print("  - INBOX")
+        print("  - [Gmail]/All Mail")
+        print("  - [Gmail]/Bin (Trash)")
+        print("  - [Gmail]/Spam")
+        print("  - [Gmail]/Sent Mail")
+        print("  - [Gmail]/Drafts")
+        
+        custom_folder = input("\nEnter folder name to try: ").strip()
+        if custom_folder:
+            return [custom_folder]
         else:
-            print("Please enter a number between 1-8.")
+            print("No folder entered.")
+    return None
+
+
+def _choose_custom_folder(folder_map, imap_conn):
+    """Handle menu choice 7: a folder/label name typed by the user."""
+    custom_folder = input("Enter custom folder/label name: ").strip()
+    if custom_folder:
+        return [custom_folder]
+    print("Folder name cannot be empty.")
+    return None
+
+
+def _choose_multiple_folders(folder_map, imap_conn):
+    """Handle menu choice 8: several numbered folders at once."""
+    print("\nSelect multiple folders (enter numbers separated by commas, e.g., 1,2,4):")
+    print("Available options: 1=INBOX, 2=All Mail, 3=Trash, 4=Spam, 5=Sent Mail")
+    
+    selections = input("Enter selections: ")
+    sels = [sel for sel in (part.strip() for part in selections.split(',')) if sel]
+    folders = [folder_map[sel] for sel in sels if sel in folder_map]
+    for sel in sels:
+        if sel not in folder_map:
+            print(f"Invalid selection: {sel}")
+    
+    if folders:
+        return folders
+    print("No valid folders selected.")
+    return None
+
+
+# Folder menu dispatch table; handlers return a folder list, None to
+# prompt again, or _SHOW_MENU to redisplay the menu
+_FOLDER_CHOICE_HANDLERS = {
+    '1': _choose_mapped_folder('1'),
+    '2': _choose_all_mail,
+    '3': _choose_mapped_folder('3'),
+    '4': _choose_mapped_folder('4'),
+    '5': _choose_mapped_folder('5'),
+    '6': _choose_listed_folder,
+    '7': _choose_custom_folder,
+    '8': _choose_multiple_folders,
+}
+
+
+def get_user_input_from_dict(values):
+    """
+    Build a configuration dictionary from pre-supplied values without prompting.
+    
+    Args:
+        values (dict): Values with at least email, password and cutoff_date
+        
+    Returns:
+        dict: Configuration dictionary, or None if any field is invalid
+    """
+    import logging
+    
+    config = dict(_ENV_CONFIG_DEFAULTS)
+    config.update(values)
+    # A single folder may be given as a plain string
+    if isinstance(config['folders'], str):
+        config['folders'] = [config['folders']]
+    elif isinstance(config['folders'], tuple):
+        config['folders'] = list(config['folders'])
+    
+    errors = _validate_config(config)
+    if errors:
+        for field, message in errors:
+            logging.warning(f"Invalid {field}: {message}")
+        return None
+    
+    if not config['delete_old']:
+        config['dry_run'] = False
+        config['fast_mode'] = False
+    return config
+
+
+def _load_env_config(raw_config):
+    """
+    Build a configuration dictionary from the ZEROMAIL_CONFIG JSON value.
+    
+    Args:
+        raw_config (str): JSON object with at least email, password and cutoff_date
+        
+    Returns:
+        dict: Configuration dictionary, or None if the value is unusable
+    """
+    import json
+    import logging
+    
+    try:
+        values = json.loads(raw_config)
+    except ValueError as e:
+        logging.warning(f"Ignoring ZEROMAIL_CONFIG, invalid JSON: {e}")
+        return None
+    
+    if not isinstance(values, dict):
+        logging.warning("Ignoring ZEROMAIL_CONFIG, expected a JSON object")
+        return None
+    
+    return get_user_input_from_dict(values)
+
+
+def _prompt_email():
+    """Prompt for the Gmail address."""
+    return input("Enter your Gmail address: ").strip()
+
+
+def _prompt_password():
+    """Prompt for the Gmail password without echoing it."""
+    import getpass
+    return getpass.getpass("Password: ").strip()
+
+
+def _prompt_cutoff_date():
+    """Prompt for the cutoff date, showing today's date for reference."""
+    print(f"\nCurrent date: {datetime.datetime.now().strftime('%d-%b-%Y')}")
+    return input("Enter cutoff date for old emails (DD-MMM-YYYY, e.g., 01-Jul-2023): ").strip()
+
+
+# Prompt used to re-ask a field that failed validation
+_FIELD_PROMPTS = {
+    'email': _prompt_email,
+    'password': _prompt_password,
+    'cutoff_date': _prompt_cutoff_date,
+    'folders': get_folder_selection,
+}
 
 
 def get_user_input():
@@ -211,23 +506,24 @@ def get_user_input():
     Returns:
         dict: Configuration dictionary with user inputs, or None if cancelled
     """
+    # Scripted runs can skip every prompt by supplying the config as JSON
+    env_config = os.environ.get('ZEROMAIL_CONFIG')
+    if env_config:
+        config = _load_env_config(env_config)
+        if config is not None:
+            return config
+    
     print("=" * 60)
     print("Gmail IMAP Cleaner - Configuration Setup")
     print("=" * 60)
     
     config = {}
     
-    # Get email address
-    while True:
-        email = input("Enter your Gmail address: ").strip()
-        if email and '@' in email and email.endswith(('@gmail.com', '@googlemail.com')):
-            config['email'] = email
-            break
-        else:
-            print("Please enter a valid Gmail address (must end with @gmail.com)")
+    # Collect the raw fields first, validation happens once afterwards
+    config['email'] = _prompt_email()
     
     # Show authentication help
-    show_auth_help = input("\nDo you need help setting up Gmail authentication? (y/n): ").lower().startswith('y')
+    show_auth_help = _ask_yes("\nDo you need help setting up Gmail authentication? (y/n): ")
     if show_auth_help:
         show_authentication_help()
         input("Press Enter to continue after setting up authentication...")
@@ -236,52 +532,60 @@ def get_user_input():
     print("\nEnter your Gmail App Password (recommended) or regular password:")
     print("App Password: 16-character code from Google Account settings")
     print("Regular Password: Only works if 'Less Secure Apps' is enabled")
+    config['password'] = _prompt_password()
     
-    while True:
-        password = getpass.getpass("Password: ").strip()
-        if password:
-            config['password'] = password
-            break
-        else:
-            print("Password cannot be empty.")
-    
-    # Get cutoff date
-    while True:
-        print(f"\nCurrent date: {datetime.datetime.now().strftime('%d-%b-%Y')}")
-        cutoff_date = input("Enter cutoff date for old emails (DD-MMM-YYYY, e.g., 01-Jul-2023): ").strip()
-        if validate_date_format(cutoff_date):
-            config['cutoff_date'] = cutoff_date
-            break
-        else:
-            print("Please enter date in DD-MMM-YYYY format (e.g., 01-Jul-2023).")
+    config['cutoff_date'] = _prompt_cutoff_date()
     
     # Get folder selection (will be refined after connection)
     config['folders'] = get_folder_selection()
     
-    # Ask about operations to perform
+    # Rules are only needed once a session is being set up, so offer the default file here
+    _get_enhanced_config().ensure_rules_file()
+    
+    # Re-prompt only the fields that failed validation
+    errors = _validate_config(config)
+    while errors:
+        for field, message in errors:
+            print(message)
+            config[field] = _FIELD_PROMPTS[field]()
+        errors = _validate_config(config)
+    
+    # Ask about operations to perform in a single prompt
     print("\nSelect operations to perform:")
-    config['delete_old'] = input("Delete old emails? (y/n): ").lower().startswith('y')
-    config['process_unsubscribe'] = input("Process unsubscribe emails? (y/n): ").lower().startswith('y')
+    print("  delete = Delete old emails")
+    print("  unsub  = Process unsubscribe emails")
+    print("  dry    = Perform dry run first (recommended, with delete)")
+    print("  fast   = Use fast deletion mode for large batches (with delete)")
+    while True:
+        selected = {op.strip() for op in input("Operations (comma-separated, e.g. delete,dry): ").lower().split(',')}
+        selected.discard('')
+        unknown = selected - _OPERATION_CHOICES
+        if not unknown:
+            break
+        print(f"Unknown operation(s): {', '.join(sorted(unknown))}")
     
-    if config['delete_old']:
-        config['dry_run'] = input("Perform dry run first (recommended)? (y/n): ").lower().startswith('y')
-        config['fast_mode'] = input("Use fast deletion mode for large batches? (y/n): ").lower().startswith('y')
-    else:
-        config['dry_run'] = False
-        config['fast_mode'] = False
+    config['delete_old'] = 'delete' in selected
+    config['process_unsubscribe'] = 'unsub' in selected
+    config['dry_run'] = config['delete_old'] and 'dry' in selected
+    config['fast_mode'] = config['delete_old'] and 'fast' in selected
     
     # Configuration summary
-    print("\nConfiguration Summary:")
-    print(f"Email: {config['email']}")
-    print(f"Cutoff Date: {config['cutoff_date']}")
-    print(f"Folders: {', '.join(config['folders'])}")
-    print(f"Delete Old Emails: {'Yes' if config['delete_old'] else 'No'}")
-    print(f"Process Unsubscribe: {'Yes' if config['process_unsubscribe'] else 'No'}")
+    summary = (
+        "\nConfiguration Summary:\n"
+        f"Email: {config['email']}\n"
+        f"Cutoff Date: {config['cutoff_date']}\n"
+        f"Folders: {', '.join(config['folders'])}\n"
+        f"Delete Old Emails: {'Yes' if config['delete_old'] else 'No'}\n"
+        f"Process Unsubscribe: {'Yes' if config['process_unsubscribe'] else 'No'}\n"
+    )
     if config['delete_old']:
-        print(f"Dry Run: {'Yes' if config['dry_run'] else 'No'}")
-        print(f"Fast Mode: {'Yes' if config['fast_mode'] else 'No'}")
+        summary += (
+            f"Dry Run: {'Yes' if config['dry_run'] else 'No'}\n"
+            f"Fast Mode: {'Yes' if config['fast_mode'] else 'No'}\n"
+        )
+    sys.stdout.write(summary)
     
-    confirm = input("\nProceed with these settings? (y/n): ").lower().startswith('y')
+    confirm = _ask_yes("\nProceed with these settings? (y/n): ")
     if not confirm:
         print("Configuration cancelled.")
         return None
@@ -300,46 +604,42 @@ def refine_folder_selection(config, imap_conn):
     Returns:
         bool: True if folders are valid, False if user wants to change
     """
+    import logging
+    
     # Try to validate current folder selection
     try:
-        available_folders = imap_conn.list_folders()
+        available_folders = _cached_list_folders(imap_conn)
         invalid_folders = []
         corrected_folders = []
         
+        # Fold each available folder name once, outside the per-folder loop
+        avail_set = set(available_folders)
+        avail_pairs = [(af, af.casefold()) for af in available_folders]
+        avail_folded = {}
+        for available_folder, available_folded in avail_pairs:
+            avail_folded.setdefault(available_folded, available_folder)
+        
         for folder in config['folders']:
-            if folder in available_folders or folder == 'INBOX':
+            if folder in avail_set or folder == 'INBOX':
                 corrected_folders.append(folder)
-            else:
-                # Try to find a match with Gmail folder variations
-                found_match = False
-                
-                # Check for partial matches or common variations
-                for available_folder in available_folders:
-                    # Direct match
-                    if folder.lower() == available_folder.lower():
-                        corrected_folders.append(available_folder)
-                        found_match = True
-                        break
-                    # Check if it's a Gmail folder variation
-                    elif folder.lower() in ['bin', 'trash'] and 'bin' in available_folder.lower():
-                        corrected_folders.append(available_folder)
-                        found_match = True
-                        break
-                    elif folder.lower() in ['all mail', 'allmail'] and 'all mail' in available_folder.lower():
-                        corrected_folders.append(available_folder)
-                        found_match = True
-                        break
-                    elif folder.lower() == 'spam' and 'spam' in available_folder.lower():
-                        corrected_folders.append(available_folder)
-                        found_match = True
-                        break
-                    elif folder.lower() in ['sent', 'sent mail'] and 'sent' in available_folder.lower():
-                        corrected_folders.append(available_folder)
-                        found_match = True
+                continue
+            
+            # Direct case-insensitive match
+            folder_folded = folder.casefold()
+            match = avail_folded.get(folder_folded)
+            
+            # Check if it's a Gmail folder variation
+            needle = _MATCH_NEEDLES.get(folder_folded) if match is None else None
+            if needle is not None:
+                for available_folder, available_folded in avail_pairs:
+                    if needle in available_folded:
+                        match = available_folder
                         break
-                
-                if not found_match:
-                    invalid_folders.append(folder)
+            
+            if match is None:
+                invalid_folders.append(folder)
+            else:
+                corrected_folders.append(match)
         
         if invalid_folders:
             print(f"\nWarning: The following folders were not found: {', '.join(invalid_folders)}")
@@ -347,7 +647,7 @@ def refine_folder_selection(config, imap_conn):
             for i, folder in enumerate(available_folders, 1):
                 print(f"{i:2d}. {folder}")
             
-            change_selection = input("\nWould you like to change your folder selection? (y/n): ").lower().startswith('y')
+            change_selection = _ask_yes("\nWould you like to change your folder selection? (y/n): ")
             if change_selection:
                 config['folders'] = get_folder_selection(imap_conn)
                 return True
@@ -403,19 +703,23 @@ def handle_authentication_error():
     print("instead of an App Password.")
     print()
     
-    show_authentication_help()
+    if _auth_help_shown:
+        print("See the App Password setup instructions shown earlier.")
+    else:
+        show_authentication_help()
     
-    retry = input("\nWould you like to try again with different credentials? (y/n): ").lower().startswith('y')
+    retry = _ask_yes("\nWould you like to try again with different credentials? (y/n): ")
     return retry
 
 
-# Default configuration values
-DEFAULT_CONFIG = {
+# Default configuration values (read-only; layer overrides with
+# collections.ChainMap(overrides, DEFAULT_CONFIG) instead of copying)
+DEFAULT_CONFIG = MappingProxyType({
     'imap_server': 'imap.gmail.com',
     'imap_port': 993,
     'request_delay': 1,
     'batch_size': 500,  # Increased for better performance
     'http_timeout': 10,
-    'log_level': logging.INFO,
+    'log_level': 20,  # logging.INFO
     'log_format': '%(asctime)s - %(levelname)s - %(message)s'
-}
\ No newline at end of file
+})
\ No newline at end of file
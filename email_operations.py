@@ -5,21 +5,353 @@ Email Operations Module for Gmail IMAP Cleaner
 Handles email search, deletion, and metadata extraction operations.
 """
 
+import base64
 import email
+import email.policy
 import datetime
+import functools
 import logging
 import imaplib
+import itertools
+import quopri
+import re
+import sys
+from collections import defaultdict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from email.feedparser import BytesFeedParser
 from email.header import decode_header
+from email.parser import BytesParser
 from email.utils import parsedate_tz, mktime_tz
 
+from imap_connection import GmailIMAPConnection
+
+# Try to import optional async IMAP support
+try:
+    import asyncio
+    import aioimaplib
+    AIOIMAPLIB_AVAILABLE = True
+except ImportError:
+    AIOIMAPLIB_AVAILABLE = False
+
+
+# Keep STORE command lines well under the RFC 2683 1000-octet guidance
+MAX_SEQUENCE_SET_LENGTH = 900
+
+# Slice size used when feeding large messages to the email parser
+MESSAGE_FEED_CHUNK_SIZE = 64 * 1024
+
+
+# Result of counting one folder: count is None when error says why it is unknown
+FolderCount = namedtuple('FolderCount', ['count', 'error'], defaults=(None, None))
+
+
+# Message count inside a STATUS response, e.g. b'"INBOX" (MESSAGES 11481)'
+_STATUS_MESSAGES_RE = re.compile(rb'MESSAGES (\d+)')
+
+# Subject/From/Date header lines, including folded continuation lines
+_HEADER_RE = re.compile(rb'^(Subject|From|Date):[ \t]*((?:.*(?:\r?\n[ \t].*)*))', re.M | re.I)
+
+# Line breaks that fold a long header value onto the next line
+_HEADER_FOLD_RE = re.compile(rb'\r?\n(?=[ \t])')
+
+# Header-only FETCH items used for deletion previews
+_PREVIEW_FETCH_ITEMS = '(BODY.PEEK[HEADER.FIELDS (SUBJECT FROM DATE)])'
+
+# Tokens of a parenthesised IMAP response such as BODYSTRUCTURE
+_IMAP_TOKEN_RE = re.compile(rb'[()]|"(?:[^"\\]|\\.)*"|[^\s()"]+')
+_IMAP_QUOTED_ESCAPE_RE = re.compile(rb'\\(.)')
+
+# Start of a message's data and the section of a BODY[...] item in a FETCH response
+_FETCH_SEQUENCE_RE = re.compile(rb'^(\d+) \(')
+_FETCH_SECTION_RE = re.compile(rb'BODY\[([\d.]+)\]')
+
+# UID item inside a FETCH response, e.g. b'4 (UID 1207 BODY[...] {312}'
+_FETCH_UID_RE = re.compile(rb'\bUID (\d+)')
+
+# Errors meaning the connection itself is gone (TLS and socket failures are OSErrors);
+# commands that hit one are retried once on a fresh connection
+CONNECTION_LOST_ERRORS = (imaplib.IMAP4.abort, OSError)
+
+# Quoted-printable soft line break (RFC 2045 6.7 rule 5)
+_QP_SOFT_BREAK_RE = re.compile(rb'=\r?\n')
+
+
+@functools.lru_cache(maxsize=32)
+def _parse_cutoff_cached(cutoff_date_str):
+    """Parse a DD-MMM-YYYY cutoff date; raises ValueError if malformed."""
+    return datetime.datetime.strptime(cutoff_date_str, "%d-%b-%Y")
+
+
+@functools.lru_cache(maxsize=32)
+def _format_imap_date_cached(ordinal):
+    """Format a proleptic Gregorian ordinal as an IMAP search date."""
+    return datetime.date.fromordinal(ordinal).strftime("%d-%b-%Y")
+
+
+def _parse_status_count(status_line):
+    """Get the MESSAGES count from one line of STATUS data, or None if absent."""
+    if isinstance(status_line, str):
+        status_line = status_line.encode()
+    elif not isinstance(status_line, bytes):
+        return None
+    match = _STATUS_MESSAGES_RE.search(status_line)
+    return int(match.group(1)) if match else None
+
+
+def _iter_folder_pairs(folders, per_folder_ids):
+    """Yield (email_id, folder) pairs without building a list per folder."""
+    for folder, folder_ids in zip(folders, per_folder_ids):
+        for email_id in folder_ids:
+            yield email_id, folder
+
+
+def _group_by_folder(email_folder_pairs):
+    """Group (email_id, folder) pairs into a folder -> [email_id] mapping."""
+    folder_groups = defaultdict(list)
+    for email_id, folder in email_folder_pairs:
+        folder_groups[folder].append(email_id)
+    return folder_groups
+
+
+def _unfold_header(raw):
+    """Turn a raw (possibly folded) header value into text."""
+    return _HEADER_FOLD_RE.sub(b'', raw).rstrip(b'\r').decode('utf-8', 'replace')
+
+
+def _decode_header_fast(raw):
+    """Decode an RFC 2047 header, taking a shortcut for single-fragment values."""
+    if raw is None:
+        return 'No Subject'
+    parts = decode_header(raw)
+    if len(parts) == 1:
+        text, encoding = parts[0]
+        return text.decode(encoding or 'utf-8', 'replace') if isinstance(text, bytes) else text
+    return ''.join(
+        text.decode(encoding or 'utf-8', 'replace') if isinstance(text, bytes) else text
+        for text, encoding in parts
+    )
+
+
+def _compress_to_sequence_set(email_ids, max_length=MAX_SEQUENCE_SET_LENGTH):
+    """
+    Coalesce message ids into IMAP sequence-set chunks such as '1:4,7:9'.
+    
+    Args:
+        email_ids: Message ids as str, bytes or int
+        max_length: Maximum length of each returned chunk
+        
+    Returns:
+        list: Sequence-set strings, each at most max_length characters
+    """
+    numbers = sorted({int(email_id) for email_id in email_ids})
+    
+    runs = []
+    start = prev = None
+    for number in numbers:
+        if prev is not None and number == prev + 1:
+            prev = number
+            continue
+        if start is not None:
+            runs.append(str(start) if start == prev else f"{start}:{prev}")
+        start = prev = number
+    if start is not None:
+        runs.append(str(start) if start == prev else f"{start}:{prev}")
+    
+    chunks = []
+    current = []
+    current_length = 0
+    for run in runs:
+        if current and current_length + 1 + len(run) > max_length:
+            chunks.append(','.join(current))
+            current = []
+            current_length = 0
+        current_length += len(run) + (1 if current else 0)
+        current.append(run)
+    if current:
+        chunks.append(','.join(current))
+    return chunks
+
+
+def _sequence_set_size(sequence_set):
+    """Count the messages covered by a sequence-set string built above."""
+    size = 0
+    for part in sequence_set.split(','):
+        start, _, end = part.partition(':')
+        size += int(end) - int(start) + 1 if end else 1
+    return size
+
+
+def _parse_message_bytes(message_bytes):
+    """
+    Parse a raw message without the StringIO copy of message_from_bytes.
+    
+    Python 3.13+ parses bytes directly; older versions are fed in
+    MESSAGE_FEED_CHUNK_SIZE slices to keep line buffering small.
+    """
+    if sys.version_info >= (3, 13) or len(message_bytes) <= MESSAGE_FEED_CHUNK_SIZE:
+        return BytesParser(policy=email.policy.default).parsebytes(message_bytes)
+    
+    parser = BytesFeedParser(policy=email.policy.default)
+    view = memoryview(message_bytes)
+    for start in range(0, len(view), MESSAGE_FEED_CHUNK_SIZE):
+        parser.feed(view[start:start + MESSAGE_FEED_CHUNK_SIZE].tobytes())
+    return parser.close()
+
+
+def _parse_imap_list(data):
+    """
+    Parse a parenthesised IMAP response into nested lists.
+    
+    Quoted strings and atoms become bytes and NIL becomes None.
+    
+    Raises:
+        ValueError: If the parentheses do not balance
+    """
+    stack = [[]]
+    for token in _IMAP_TOKEN_RE.findall(data):
+        if token == b'(':
+            stack.append([])
+        elif token == b')':
+            if len(stack) == 1:
+                raise ValueError("unbalanced ')' in IMAP response")
+            item = stack.pop()
+            stack[-1].append(item)
+        elif token.startswith(b'"'):
+            stack[-1].append(_IMAP_QUOTED_ESCAPE_RE.sub(rb'\1', token[1:-1]))
+        elif token.upper() == b'NIL':
+            stack[-1].append(None)
+        else:
+            stack[-1].append(token)
+    if len(stack) != 1:
+        raise ValueError("unbalanced '(' in IMAP response")
+    return stack[0]
+
+
+def _text_sections(body, section=''):
+    """
+    List the text/plain and text/html parts of a parsed BODYSTRUCTURE.
+    
+    Of the alternatives in a multipart/alternative only the HTML one is kept
+    when present, otherwise the first plain-text one.
+    
+    Returns:
+        list: (section, transfer_encoding) pairs, e.g. [('1.1', b'quoted-printable')]
+    """
+    return _walk_text_sections(body, section)[0]
+
+
+def _walk_text_sections(body, section):
+    """Return (sections, has_html) for one BODYSTRUCTURE node."""
+    if body and isinstance(body[0], list):
+        # Multipart: child bodies first, then the subtype and extension data
+        children = []
+        subtype = b''
+        for index, child in enumerate(body, 1):
+            if not isinstance(child, list):
+                subtype = (child or b'').lower()
+                break
+            children.append(_walk_text_sections(child, f"{section}.{index}" if section else str(index)))
+        
+        if subtype == b'alternative':
+            chosen = next((child for child in children if child[1]), None)
+            if chosen is None:
+                chosen = next((child for child in children if child[0]), ([], False))
+            return chosen
+        return [item for child in children for item in child[0]], any(child[1] for child in children)
+    
+    media_type = (body[0] or b'').lower()
+    subtype = (body[1] or b'').lower()
+    if media_type == b'text' and subtype in (b'plain', b'html'):
+        encoding = (body[5] or b'7bit').lower() if len(body) > 5 else b'7bit'
+        return [(section or '1', encoding)], subtype == b'html'
+    return [], False
+
+
+def _select_text_parts(part):
+    """
+    Pick the text/plain and text/html leaves of a parsed message.
+    
+    Like _text_sections, a multipart/alternative contributes only its HTML
+    rendering when it has one, otherwise its first plain-text one.
+    """
+    content_type = part.get_content_type()
+    if content_type == 'multipart/alternative':
+        choices = [_select_text_parts(sub) for sub in part.get_payload()]
+        for choice in choices:
+            if any(leaf.get_content_type() == 'text/html' for leaf in choice):
+                return choice
+        return next((choice for choice in choices if choice), [])
+    if part.is_multipart():
+        return [leaf for sub in part.get_payload() for leaf in _select_text_parts(sub)]
+    return [part] if content_type in ('text/plain', 'text/html') else []
+
+
+def _may_contain(payload, encoding, keyword_re):
+    """
+    Cheaply test an encoded section for a keyword before decoding it.
+    
+    Quoted-printable soft line breaks are removed first so a word wrapped across
+    lines still matches. Base64 cannot be searched without decoding, so it always
+    passes.
+    """
+    if encoding == b'base64':
+        return True
+    if encoding == b'quoted-printable':
+        payload = _QP_SOFT_BREAK_RE.sub(b'', payload)
+    return keyword_re.search(payload) is not None
+
+
+def _decode_transfer_encoding(payload, encoding):
+    """Undo a part's Content-Transfer-Encoding."""
+    if encoding == b'base64':
+        return base64.b64decode(payload)
+    if encoding == b'quoted-printable':
+        return quopri.decodestring(payload)
+    return payload
+
 
 class EmailOperations:
     """
     Email operations handler for search, deletion, and metadata extraction.
     """
     
+    # Parallel connections used for multi-folder searches (Gmail allows 15)
+    SEARCH_POOL_SIZE = 4
+    
+    # Seconds allowed for a parallel-search connection to greet, log in or log out
+    SEARCH_CONNECT_TIMEOUT = 30
+    
+    # Messages per FETCH when pulling bodies in bulk; CleanerConfig.max_batch_size
+    # can be passed as batch_size instead
+    CONTENT_FETCH_BATCH_SIZE = 100
+    
+    # Extra connections that fetch content batches concurrently; kept small to
+    # leave room under Gmail's 15-connection limit for other clients
+    CONTENT_FETCH_CONNECTIONS = 3
+    
+    # Names under which Gmail exposes the All Mail folder
+    _GMAIL_ALL_MAIL = frozenset({
+        '[Gmail]/All Mail',
+        '[Google Mail]/All Mail',
+        '"[Gmail]/All Mail"',
+        '"[Google Mail]/All Mail"',
+        'All Mail'
+    })
+    
+    # Gmail system folders where messages actually live (All Mail only mirrors them)
+    _GMAIL_SOURCE_FOLDERS = (
+        '[Gmail]/Sent Mail',
+        '[Google Mail]/Sent Mail',
+        '[Gmail]/Drafts',
+        '[Google Mail]/Drafts',
+        '[Gmail]/Spam',
+        '[Google Mail]/Spam'
+    )
+    
     def __init__(self, imap_connection):
         self.imap_connection = imap_connection
+        self._capabilities = frozenset()
+        self._capabilities_for = None
         self.operation_summary = {
             'emails_deleted': 0,
             'unsubscribe_emails_found': 0,
@@ -48,8 +380,8 @@ class EmailOperations:
     def parse_cutoff_date(self, cutoff_date_str):
         """Parse the cutoff date string from configuration format to datetime object."""
         try:
-            return datetime.datetime.strptime(cutoff_date_str, "%d-%b-%Y")
-        except ValueError as e:
+            return _parse_cutoff_cached(cutoff_date_str)
+        except (TypeError, ValueError) as e:
             logging.error(f"Invalid cutoff date format '{cutoff_date_str}': {e}")
             return None
     
@@ -57,10 +389,25 @@ class EmailOperations:
         """Format datetime object for IMAP BEFORE search command."""
         if date_obj is None:
             return None
-        return date_obj.strftime("%d-%b-%Y")
+        return _format_imap_date_cached(date_obj.toordinal())
+    
+    def prepare_search_date(self, cutoff_date_str):
+        """Parse and format a cutoff date once so per-folder searches can reuse it."""
+        cutoff_date = self.parse_cutoff_date(cutoff_date_str)
+        if cutoff_date is None:
+            logging.error("Failed to parse cutoff date for search")
+            return None
+        return self.format_date_for_imap_search(cutoff_date)
     
     def search_old_emails(self, cutoff_date_str, folder_name=None):
-        """Search for emails older than the cutoff date using IMAP BEFORE command."""
+        """Search for emails older than the cutoff date using IMAP BEFORE command; ids are returned as bytes."""
+        search_date = self.prepare_search_date(cutoff_date_str)
+        if search_date is None:
+            return []
+        return self.search_old_emails_prepared(search_date, folder_name)
+    
+    def search_old_emails_prepared(self, search_date, folder_name=None, uid=False):
+        """Search for emails before an already formatted IMAP search date, by UID if uid is set."""
         connection = self.imap_connection.get_connection()
         if not connection:
             logging.error("No active IMAP connection for email search")
@@ -73,17 +420,14 @@ class EmailOperations:
                 return []
         
         try:
-            cutoff_date = self.parse_cutoff_date(cutoff_date_str)
-            if cutoff_date is None:
-                logging.error("Failed to parse cutoff date for search")
-                return []
-            
-            search_date = self.format_date_for_imap_search(cutoff_date)
             current_folder = folder_name or "current folder"
             logging.info(f"Searching for emails before {search_date} in {current_folder}")
             
             search_criteria = f'BEFORE {search_date}'
-            result, email_ids = connection.search(None, search_criteria)
+            if uid:
+                result, email_ids = connection.uid('SEARCH', search_criteria)
+            else:
+                result, email_ids = connection.search(None, search_criteria)
             
             if result != 'OK':
                 logging.error(f"IMAP search failed: {email_ids}")
@@ -91,10 +435,11 @@ class EmailOperations:
             
             if email_ids[0]:
                 id_list = email_ids[0].split()
-                logging.info(f"Found {len(id_list)} emails older than {cutoff_date_str} in {current_folder}")
-                return [id.decode() for id in id_list]
+                logging.info(f"Found {len(id_list)} emails older than {search_date} in {current_folder}")
+                # Ids stay as bytes; imaplib sends them back over the socket unchanged
+                return id_list
             else:
-                logging.info(f"No emails found older than {cutoff_date_str} in {current_folder}")
+                logging.info(f"No emails found older than {search_date} in {current_folder}")
                 return []
                 
         except imaplib.IMAP4.error as e:
@@ -105,15 +450,27 @@ class EmailOperations:
             return []
     
     def search_old_emails_multiple_folders(self, cutoff_date_str, folders):
-        """Search for old emails across multiple folders."""
+        """Search for old emails across multiple folders, returning (bytes_id, folder) pairs."""
         all_email_ids = []
         folder_results = {}
         
-        for folder in folders:
-            logging.info(f"Processing folder: {folder}")
-            folder_ids = self.search_old_emails(cutoff_date_str, folder)
+        search_date = self.prepare_search_date(cutoff_date_str)
+        if search_date is None:
+            return []
+        
+        per_folder_ids = None
+        if len(folders) > 1:
+            per_folder_ids = self._search_folders_parallel(search_date, folders)
+        
+        if per_folder_ids is None:
+            per_folder_ids = []
+            for folder in folders:
+                logging.info(f"Processing folder: {folder}")
+                per_folder_ids.append(self.search_old_emails_prepared(search_date, folder))
+        
+        for folder, folder_ids in zip(folders, per_folder_ids):
             folder_results[folder] = len(folder_ids)
-            all_email_ids.extend([(email_id, folder) for email_id in folder_ids])
+        all_email_ids.extend(_iter_folder_pairs(folders, per_folder_ids))
         
         # Log summary
         logging.info("=" * 50)
@@ -126,8 +483,89 @@ class EmailOperations:
         
         return all_email_ids
     
+    def _search_folders_parallel(self, search_date, folders):
+        """
+        Search several folders at once over a small pool of aioimaplib connections.
+        
+        Returns a list of id lists in folder order, or None when the parallel
+        path is unavailable and the caller should search sequentially.
+        """
+        if not AIOIMAPLIB_AVAILABLE:
+            return None
+        
+        credentials = [getattr(self.imap_connection, attr, None) for attr in ('server', 'port', 'email', 'password')]
+        if not all(credentials):
+            return None
+        
+        pool_size = min(self.SEARCH_POOL_SIZE, len(folders))
+        logging.info(f"Searching {len(folders)} folders in parallel over {pool_size} connections")
+        
+        try:
+            return asyncio.run(self._search_folders_async(credentials, folders, search_date, pool_size))
+        except Exception as e:
+            logging.warning(f"Parallel folder search failed, falling back to sequential search: {e}")
+            return None
+    
+    async def _search_folders_async(self, credentials, folders, search_date, pool_size):
+        """Fan folder searches out across pool_size connections and gather the results."""
+        server, port, user, password = credentials
+        queue = asyncio.Queue()
+        for index, folder in enumerate(folders):
+            queue.put_nowait((index, folder))
+        results = [[] for _ in folders]
+        clients = []
+        
+        async def open_client():
+            client = aioimaplib.IMAP4_SSL(host=server, port=port)
+            clients.append(client)
+            await client.wait_hello_from_server()
+            response = await client.login(user, password)
+            if response.result != 'OK':
+                raise imaplib.IMAP4.error(f"Login failed: {response.lines}")
+            return client
+        
+        async def worker():
+            client = await asyncio.wait_for(open_client(), self.SEARCH_CONNECT_TIMEOUT)
+            while not queue.empty():
+                index, folder = queue.get_nowait()
+                results[index] = await self._search_folder_async(client, folder, search_date)
+        
+        try:
+            # Let every worker finish or fail before any connection is closed
+            outcomes = await asyncio.gather(*[worker() for _ in range(pool_size)], return_exceptions=True)
+        finally:
+            for client in clients:
+                try:
+                    await asyncio.wait_for(client.logout(), self.SEARCH_CONNECT_TIMEOUT)
+                except Exception as e:
+                    logging.debug(f"Error logging out parallel search connection: {e}")
+        
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                raise outcome
+        return results
+    
+    async def _search_folder_async(self, client, folder, search_date):
+        """SELECT a folder and run the BEFORE search on an aioimaplib client."""
+        logging.info(f"Searching for emails before {search_date} in {folder}")
+        mailbox = folder if folder.startswith('"') else f'"{folder}"'
+        
+        response = await client.select(mailbox)
+        if response.result != 'OK':
+            logging.error(f"Failed to select folder: {folder}")
+            return []
+        
+        response = await client.search(f'BEFORE {search_date}')
+        if response.result != 'OK':
+            logging.error(f"IMAP search failed in {folder}: {response.lines}")
+            return []
+        
+        id_list = response.lines[0].split() if response.lines and response.lines[0] else []
+        logging.info(f"Found {len(id_list)} emails older than {search_date} in {folder}")
+        return id_list
+    
     def get_email_metadata(self, email_id):
-        """Extract metadata (subject, sender, date) from an email."""
+        """Extract metadata (subject, sender, date) from an email id given as bytes or str."""
         connection = self.imap_connection.get_connection()
         if not connection:
             logging.error("No active IMAP connection for metadata extraction")
@@ -140,36 +578,105 @@ class EmailOperations:
                 logging.warning(f"Failed to fetch email {email_id}: {email_data}")
                 return None
             
-            email_message = email.message_from_bytes(email_data[0][1])
-            
-            # Extract subject
-            subject = email_message.get('Subject', 'No Subject')
-            if subject:
-                decoded_subject = decode_header(subject)
-                subject = ''.join([
-                    part[0].decode(part[1] or 'utf-8') if isinstance(part[0], bytes) else part[0]
-                    for part in decoded_subject
-                ])
-            
-            # Extract sender
-            sender = email_message.get('From', 'Unknown Sender')
-            
-            # Extract and parse date
-            date_str = email_message.get('Date', '')
-            email_date = self.parse_email_date(date_str)
-            
-            return {
-                'id': email_id,
-                'subject': subject[:100] + '...' if len(subject) > 100 else subject,
-                'from': sender,
-                'date': email_date,
-                'date_str': date_str
-            }
+            return self._build_metadata(email_id, email_data[0][1])
             
         except Exception as e:
             logging.warning(f"Error extracting metadata for email {email_id}: {e}")
             return None
     
+    def get_email_metadata_batch(self, email_ids, uid=False):
+        """Extract metadata for several emails with a single header-only FETCH (UID FETCH if uid is set)."""
+        connection = self.imap_connection.get_connection()
+        if not connection:
+            logging.error("No active IMAP connection for metadata extraction")
+            return {}
+        
+        metadata = {}
+        if not email_ids:
+            return metadata
+        
+        try:
+            for sequence_set in _compress_to_sequence_set(email_ids):
+                if uid:
+                    result, email_data = connection.uid('FETCH', sequence_set, _PREVIEW_FETCH_ITEMS)
+                else:
+                    result, email_data = connection.fetch(sequence_set, _PREVIEW_FETCH_ITEMS)
+                
+                if result != 'OK':
+                    logging.warning(f"Failed to fetch emails {sequence_set}: {email_data}")
+                    continue
+                
+                metadata.update(self._parse_metadata_response(email_data, email_ids, uid))
+            
+        except Exception as e:
+            logging.warning(f"Error extracting metadata for emails {email_ids}: {e}")
+        
+        return metadata
+    
+    def _parse_metadata_response(self, email_data, email_ids, uid=False):
+        """Map a header-only FETCH response back to the requested ids."""
+        wanted = {str(int(email_id)): email_id for email_id in email_ids}
+        metadata = {}
+        
+        # Responses alternate between (b'<seq> (BODY[...] {n}', header_bytes) tuples and b')'
+        for part in email_data:
+            if not isinstance(part, tuple):
+                continue
+            if uid:
+                uid_match = _FETCH_UID_RE.search(part[0])
+                sequence_id = uid_match.group(1).decode() if uid_match else None
+            else:
+                sequence_id = part[0].split(None, 1)[0].decode()
+            email_id = wanted.get(sequence_id)
+            if email_id is None:
+                continue
+            try:
+                metadata[email_id] = self._build_metadata(email_id, part[1])
+            except Exception as e:
+                logging.warning(f"Error extracting metadata for email {email_id}: {e}")
+        
+        return metadata
+    
+    def _log_previews(self, preview_ids, previews):
+        """Log one line per previewed email that could be fetched."""
+        for email_id in preview_ids:
+            metadata = previews.get(email_id)
+            if metadata:
+                logging.info(f"  - '{metadata['subject'][:60]}...' from {metadata['from']}")
+    
+    def _build_metadata(self, email_id, header_bytes):
+        """Build the metadata dict from a raw header block."""
+        # Pull the three headers straight out of the raw block (first occurrence wins)
+        headers = {}
+        for match in _HEADER_RE.finditer(header_bytes):
+            headers.setdefault(match.group(1).lower(), match.group(2))
+        
+        # Extract subject; only MIME encoded-words need decode_header
+        raw_subject = headers.get(b'subject')
+        if raw_subject is None:
+            subject = 'No Subject'
+        elif b'=?' in raw_subject:
+            subject = _decode_header_fast(_unfold_header(raw_subject))
+        else:
+            subject = _unfold_header(raw_subject)
+        
+        # Extract sender
+        raw_sender = headers.get(b'from')
+        sender = _unfold_header(raw_sender) if raw_sender is not None else 'Unknown Sender'
+        
+        # Extract and parse date
+        raw_date = headers.get(b'date')
+        date_str = _unfold_header(raw_date) if raw_date is not None else ''
+        email_date = self.parse_email_date(date_str)
+        
+        return {
+            'id': email_id,
+            'subject': subject[:100] + '...' if len(subject) > 100 else subject,
+            'from': sender,
+            'date': email_date,
+            'date_str': date_str
+        }
+    
     def delete_email(self, email_id):
         """Delete a single email by marking it for deletion."""
         connection = self.imap_connection.get_connection()
@@ -194,8 +701,16 @@ class EmailOperations:
             logging.error(f"Unexpected error deleting email {email_id}: {e}")
             return False
     
-    def expunge_deleted_emails(self):
-        """Permanently remove emails marked for deletion from the server."""
+    def expunge_deleted_emails(self, uids=None):
+        """
+        Permanently remove emails marked for deletion from the server.
+        
+        Args:
+            uids (list): If given, only these UIDs are expunged (UID EXPUNGE, needs UIDPLUS)
+            
+        Returns:
+            bool: True if expunge succeeded, False otherwise
+        """
         connection = self.imap_connection.get_connection()
         if not connection:
             logging.error("No active IMAP connection for expunge operation")
@@ -203,14 +718,21 @@ class EmailOperations:
         
         try:
             logging.info("Expunging deleted emails from server...")
-            result = connection.expunge()
+            if uids:
+                results = []
+                for uid_set in _compress_to_sequence_set(uids):
+                    typ, dat = connection._simple_command('UID', 'EXPUNGE', uid_set)
+                    results.append(connection._untagged_response(typ, dat, 'EXPUNGE'))
+            else:
+                results = [connection.expunge()]
             
-            if result[0] == 'OK':
-                expunged_count = len([r for r in result[1] if r is not None])
+            failed = [data for typ, data in results if typ != 'OK']
+            if not failed:
+                expunged_count = sum(1 for typ, data in results for r in data if r is not None)
                 logging.info(f"Successfully expunged {expunged_count} emails from server")
                 return True
             else:
-                logging.error(f"Expunge operation failed: {result[1]}")
+                logging.error(f"Expunge operation failed: {failed}")
                 return False
                 
         except imaplib.IMAP4.error as e:
@@ -220,8 +742,8 @@ class EmailOperations:
             logging.error(f"Unexpected error during expunge: {e}")
             return False
     
-    def delete_emails_bulk(self, email_ids):
-        """Delete multiple emails efficiently using bulk operations."""
+    def delete_emails_bulk(self, email_ids, uid=False):
+        """Delete multiple emails efficiently using bulk operations (UID STORE if uid is set)."""
         connection = self.imap_connection.get_connection()
         if not connection:
             logging.error("No active IMAP connection for bulk email deletion")
@@ -231,18 +753,22 @@ class EmailOperations:
             return 0
         
         try:
-            # Convert email IDs to comma-separated string for bulk operation
-            id_string = ','.join(email_ids)
-            
-            # Mark all emails for deletion in one command
-            result = connection.store(id_string, '+FLAGS', '\\Deleted')
+            # Coalesce IDs into compact sequence-set ranges for bulk operation
+            marked = 0
+            for sequence_set in _compress_to_sequence_set(email_ids):
+                if uid:
+                    result = connection.uid('STORE', sequence_set, '+FLAGS', '(\\Deleted)')
+                else:
+                    result = connection.store(sequence_set, '+FLAGS', '\\Deleted')
+                
+                if result[0] == 'OK':
+                    marked += _sequence_set_size(sequence_set)
+                else:
+                    logging.error(f"Failed to mark emails for deletion: {result[1]}")
             
-            if result[0] == 'OK':
-                logging.info(f"✓ Successfully marked {len(email_ids)} emails for deletion")
-                return len(email_ids)
-            else:
-                logging.error(f"Failed to mark emails for deletion: {result[1]}")
-                return 0
+            if marked:
+                logging.info(f"✓ Successfully marked {marked} emails for deletion")
+            return marked
                 
         except imaplib.IMAP4.error as e:
             logging.error(f"IMAP error during bulk deletion: {e}")
@@ -251,121 +777,191 @@ class EmailOperations:
             logging.error(f"Unexpected error during bulk deletion: {e}")
             return 0
     
+    def delete_batches_and_expunge(self, batches, uid=False, preview_ids=None):
+        """
+        Mark each batch of emails as deleted and then expunge the folder.
+        
+        On pipelining-capable connections every STORE and the final EXPUNGE go
+        out in a single write, so the whole folder costs about one round-trip.
+        With uid set the batches hold UIDs and only those UIDs are expunged
+        (UID EXPUNGE), leaving messages other clients flagged untouched.
+        Headers of preview_ids are fetched at the front of that same write and
+        logged before anything is deleted.
+        
+        Returns:
+            tuple: (list of per-batch deleted counts, True if expunge succeeded)
+        """
+        connection = self.imap_connection.get_connection()
+        if not connection:
+            logging.error("No active IMAP connection for bulk email deletion")
+            return [0] * len(batches), False
+        
+        batches = [batch for batch in batches if batch]
+        if not batches:
+            return [], False
+        
+        expunge_uids = [email_id for batch in batches for email_id in batch] if uid else None
+        
+        if not hasattr(connection, 'pipeline'):
+            if preview_ids:
+                self._log_previews(preview_ids, self.get_email_metadata_batch(preview_ids, uid=uid))
+            batch_counts = [self.delete_emails_bulk(batch, uid=uid) for batch in batches]
+            expunged = self.expunge_deleted_emails(expunge_uids) if any(batch_counts) else False
+            return batch_counts, expunged
+        
+        prefix = ('UID',) if uid else ()
+        try:
+            commands = [prefix + ('FETCH', sequence_set, _PREVIEW_FETCH_ITEMS)
+                        for sequence_set in _compress_to_sequence_set(preview_ids or [])]
+            preview_end = len(commands)
+            batch_slices = []
+            for batch in batches:
+                chunk_start = len(commands)
+                commands.extend(prefix + ('STORE', sequence_set, '+FLAGS', '(\\Deleted)')
+                                for sequence_set in _compress_to_sequence_set(batch))
+                batch_slices.append((chunk_start, len(commands)))
+            expunge_start = len(commands)
+            if uid:
+                commands.extend(('UID', 'EXPUNGE', uid_set) for uid_set in _compress_to_sequence_set(expunge_uids))
+            else:
+                commands.append(('EXPUNGE',))
+            results = connection.pipeline(commands)
+        except imaplib.IMAP4.error as e:
+            logging.error(f"IMAP error during pipelined deletion: {e}")
+            return [0] * len(batches), False
+        except Exception as e:
+            logging.error(f"Unexpected error during pipelined deletion: {e}")
+            return [0] * len(batches), False
+        
+        if preview_ids:
+            previews = {}
+            for typ, data in results[:preview_end]:
+                if typ == 'OK':
+                    previews.update(self._parse_metadata_response(data, preview_ids, uid))
+            self._log_previews(preview_ids, previews)
+        
+        batch_counts = []
+        for chunk_start, chunk_end in batch_slices:
+            marked = 0
+            for index in range(chunk_start, chunk_end):
+                typ, data = results[index]
+                if typ == 'OK':
+                    marked += _sequence_set_size(commands[index][len(prefix) + 1])
+                else:
+                    logging.error(f"Failed to mark emails for deletion: {data}")
+            if marked:
+                logging.info(f"✓ Successfully marked {marked} emails for deletion")
+            batch_counts.append(marked)
+        
+        expunge_results = results[expunge_start:]
+        failed = [data for typ, data in expunge_results if typ != 'OK']
+        if not failed:
+            expunged_count = sum(1 for typ, data in expunge_results for r in data if r is not None)
+            logging.info(f"Successfully expunged {expunged_count} emails from server")
+        else:
+            logging.error(f"Expunge operation failed: {failed}")
+        return batch_counts, not failed
+    
     def delete_old_emails_with_logging(self, cutoff_date_str, folders, batch_size=500):
         """Optimized workflow to find, delete, and log old emails across multiple folders."""
         logging.info("=" * 50)
         logging.info("STARTING OLD EMAIL DELETION PROCESS")
         logging.info("=" * 50)
         
-        if len(folders) == 1:
-            # Single folder processing
-            old_email_ids = self.search_old_emails(cutoff_date_str, folders[0])
-            email_folder_pairs = [(email_id, folders[0]) for email_id in old_email_ids]
-        else:
-            # Multiple folder processing
-            email_folder_pairs = self.search_old_emails_multiple_folders(cutoff_date_str, folders)
-        
-        if not email_folder_pairs:
-            logging.info("No old emails found to delete")
+        search_date = self.prepare_search_date(cutoff_date_str)
+        if search_date is None:
             return 0
         
-        logging.info(f"Found {len(email_folder_pairs)} emails to delete across {len(folders)} folder(s)")
-        
-        # Group emails by folder for efficient processing
-        folder_groups = {}
-        for email_id, folder in email_folder_pairs:
-            if folder not in folder_groups:
-                folder_groups[folder] = []
-            folder_groups[folder].append(email_id)
-        
+        total_found = 0
         total_deleted = 0
         
-        # Process each folder separately
-        for folder, email_ids in folder_groups.items():
-            logging.info(f"\nProcessing folder: {folder} ({len(email_ids)} emails)")
-            
-            # Select the folder
-            if not self.imap_connection.select_folder(folder):
-                logging.error(f"Failed to select folder {folder}, skipping...")
+        # Each folder is selected once and then searched, deleted and expunged in place
+        for folder in folders:
+            if self.is_gmail_all_mail_folder(folder):
                 continue
+            found, folder_deleted = self._search_then_delete_folder(folder, search_date, batch_size)
+            total_found += found
+            total_deleted += folder_deleted
+        
+        # All Mail is never searched itself: True Gmail Deletion searches the source folders
+        if any(self.is_gmail_all_mail_folder(folder) for folder in folders):
+            logging.info(f"\nProcessing folder: All Mail")
+            logging.warning(f"⚠ Gmail All Mail detected!")
+            logging.warning(f"⚠ Auto-switching to True Gmail Deletion for permanent removal!")
+            logging.info(f"This will delete emails from their source folders instead of just removing labels...")
             
-            # Show sample of emails that will be deleted (first 3 per folder)
-            if len(email_ids) <= 6:
-                logging.info(f"Emails to be deleted from {folder}:")
-                for email_id in email_ids[:3]:
-                    metadata = self.get_email_metadata(email_id)
-                    if metadata:
-                        logging.info(f"  - '{metadata['subject'][:60]}...' from {metadata['from']}")
-            else:
-                logging.info(f"Sample emails to be deleted from {folder}:")
-                for email_id in email_ids[:3]:
-                    metadata = self.get_email_metadata(email_id)
-                    if metadata:
-                        logging.info(f"  - '{metadata['subject'][:60]}...' from {metadata['from']}")
-                logging.info(f"  ... and {len(email_ids) - 3} more emails")
+            folder_deleted = self.delete_old_emails_true_gmail(cutoff_date_str)
             
-            # Special handling for Gmail All Mail folder
-            if self.is_gmail_all_mail_folder(folder):
-                logging.warning(f"⚠ Gmail All Mail detected!")
-                logging.warning(f"⚠ Auto-switching to True Gmail Deletion for permanent removal!")
-                logging.info(f"This will delete emails from their source folders instead of just removing labels...")
-                
-                # Use true Gmail deletion for All Mail
-                folder_deleted = self.delete_old_emails_true_gmail(cutoff_date_str)
-                
-                if folder_deleted > 0:
-                    logging.info(f"✓ {folder_deleted} emails permanently deleted via True Gmail Deletion")
-                else:
-                    logging.error(f"Failed to delete emails via True Gmail Deletion")
+            if folder_deleted > 0:
+                logging.info(f"✓ {folder_deleted} emails permanently deleted via True Gmail Deletion")
             else:
-                # Standard deletion for non-All Mail folders
-                # Process emails in batches
-                folder_deleted = 0
-                total_batches = (len(email_ids) + batch_size - 1) // batch_size
-                
-                for i in range(0, len(email_ids), batch_size):
-                    batch = email_ids[i:i + batch_size]
-                    batch_num = (i // batch_size) + 1
-                    
-                    logging.info(f"Processing {folder} batch {batch_num}/{total_batches} ({len(batch)} emails)...")
-                    
-                    # Use bulk deletion for efficiency
-                    batch_deleted = self.delete_emails_bulk(batch)
-                    folder_deleted += batch_deleted
-                    
-                    if batch_deleted != len(batch):
-                        logging.warning(f"Only {batch_deleted}/{len(batch)} emails deleted in batch {batch_num}")
-                
-                # Expunge deleted emails for this folder
-                if folder_deleted > 0:
-                    logging.info(f"Expunging {folder_deleted} deleted emails from {folder}...")
-                    if self.expunge_deleted_emails():
-                        logging.info(f"✓ {folder_deleted} emails permanently removed from {folder}")
-                    else:
-                        logging.warning(f"⚠ Some emails in {folder} may not have been permanently removed")
-            
+                logging.info(f"No emails deleted via True Gmail Deletion")
+            total_found += folder_deleted
             total_deleted += folder_deleted
-            logging.info(f"Completed {folder}: {folder_deleted}/{len(email_ids)} emails deleted")
+        
+        if not total_found:
+            logging.info("No old emails found to delete")
+            return 0
         
         # Update operation summary
         self.operation_summary['emails_deleted'] = total_deleted
         
         logging.info("=" * 50)
-        logging.info(f"OLD EMAIL DELETION COMPLETED: {total_deleted}/{len(email_folder_pairs)} emails deleted")
+        logging.info(f"OLD EMAIL DELETION COMPLETED: {total_deleted}/{total_found} emails deleted across {len(folders)} folder(s)")
         logging.info("=" * 50)
         
         return total_deleted
     
+    def _search_then_delete_folder(self, folder, search_date, batch_size):
+        """
+        Select one (non All Mail) folder, search it and delete the matches without re-selecting.
+        
+        Returns:
+            tuple: (emails found, emails deleted)
+        """
+        logging.info(f"\nProcessing folder: {folder}")
+        
+        # With UIDPLUS work by UID so the final expunge touches only our messages
+        connection = self.imap_connection.get_connection()
+        use_uid = bool(connection) and self.server_supports(connection, 'UIDPLUS')
+        
+        # search_old_emails_prepared selects the folder, which stays selected for deletion
+        email_ids = self.search_old_emails_prepared(search_date, folder, uid=use_uid)
+        if not email_ids:
+            return 0, 0
+        
+        # Process emails in batches, expunging once after the last one
+        batches = [email_ids[i:i + batch_size] for i in range(0, len(email_ids), batch_size)]
+        total_batches = len(batches)
+        logging.info(f"Processing {folder} in {total_batches} batch(es) of up to {batch_size} emails...")
+        
+        # Show sample of emails that will be deleted (first 3 per folder); the
+        # header FETCH shares the deletion's pipelined write
+        if len(email_ids) <= 6:
+            logging.info(f"Emails to be deleted from {folder}:")
+        else:
+            logging.info(f"Sample emails to be deleted from {folder}:")
+        batch_counts, expunged = self.delete_batches_and_expunge(batches, uid=use_uid, preview_ids=email_ids[:3])
+        if len(email_ids) > 6:
+            logging.info(f"  ... and {len(email_ids) - 3} more emails")
+        folder_deleted = sum(batch_counts)
+        
+        for batch_num, (batch, batch_deleted) in enumerate(zip(batches, batch_counts), 1):
+            if batch_deleted != len(batch):
+                logging.warning(f"Only {batch_deleted}/{len(batch)} emails deleted in batch {batch_num}")
+        
+        if folder_deleted > 0:
+            if expunged:
+                logging.info(f"✓ {folder_deleted} emails permanently removed from {folder}")
+            else:
+                logging.warning(f"⚠ Some emails in {folder} may not have been permanently removed")
+        
+        logging.info(f"Completed {folder}: {folder_deleted}/{len(email_ids)} emails deleted")
+        return len(email_ids), folder_deleted
+    
     def is_gmail_all_mail_folder(self, folder_name):
         """Check if the folder is Gmail's All Mail folder."""
-        gmail_all_mail_variations = [
-            '[Gmail]/All Mail',
-            '[Google Mail]/All Mail', 
-            '"[Gmail]/All Mail"',
-            '"[Google Mail]/All Mail"',
-            'All Mail'
-        ]
-        return folder_name in gmail_all_mail_variations
+        return folder_name in EmailOperations._GMAIL_ALL_MAIL
     
     def handle_gmail_all_mail_deletion(self, email_ids):
         """
@@ -382,27 +978,30 @@ class EmailOperations:
             return 0
         
         try:
-            # Convert email IDs to comma-separated string
-            id_string = ','.join(email_ids)
+            # Coalesce email IDs into compact sequence-set ranges
+            sequence_sets = _compress_to_sequence_set(email_ids)
             
             # For Gmail All Mail, we need to:
             # 1. Add the \Deleted flag
             # 2. Remove the \All label (this is what makes it disappear from All Mail)
             
             # First, mark emails as deleted
-            delete_result = connection.store(id_string, '+FLAGS', '\\Deleted')
-            if delete_result[0] != 'OK':
-                logging.error(f"Failed to mark emails for deletion: {delete_result[1]}")
-                return 0
+            for sequence_set in sequence_sets:
+                delete_result = connection.store(sequence_set, '+FLAGS', '\\Deleted')
+                if delete_result[0] != 'OK':
+                    logging.error(f"Failed to mark emails for deletion: {delete_result[1]}")
+                    return 0
             
             # Try to remove the \All label (Gmail-specific)
             try:
                 # Remove the \All label which is what keeps emails in All Mail
-                all_result = connection.store(id_string, '-X-GM-LABELS', '\\All')
-                if all_result[0] == 'OK':
-                    logging.info(f"✓ Removed \\All label from {len(email_ids)} emails")
+                for sequence_set in sequence_sets:
+                    all_result = connection.store(sequence_set, '-X-GM-LABELS', '\\All')
+                    if all_result[0] != 'OK':
+                        logging.warning(f"Could not remove \\All label: {all_result[1]}")
+                        break
                 else:
-                    logging.warning(f"Could not remove \\All label: {all_result[1]}")
+                    logging.info(f"✓ Removed \\All label from {len(email_ids)} emails")
             except imaplib.IMAP4.error:
                 # Gmail X-GM-LABELS extension might not be available
                 logging.info("Gmail label extension not available, using standard deletion")
@@ -410,7 +1009,7 @@ class EmailOperations:
             # Expunge to apply changes
             expunge_result = connection.expunge()
             if expunge_result[0] == 'OK':
-                expunged_count = len([r for r in expunge_result[1] if r is not None])
+                expunged_count = sum(1 for r in expunge_result[1] if r is not None)
                 logging.info(f"✓ Successfully processed {len(email_ids)} emails from All Mail")
                 return len(email_ids)
             else:
@@ -436,23 +1035,18 @@ class EmailOperations:
                 result, data = connection.status(folder_name, '(MESSAGES)')
                 if result == 'OK' and data:
                     # Parse response like: b'[Gmail]/All Mail (MESSAGES 11481)'
-                    status_line = data[0].decode() if isinstance(data[0], bytes) else data[0]
-                    # Extract number from parentheses
-                    import re
-                    match = re.search(r'MESSAGES (\d+)', status_line)
-                    if match:
-                        return int(match.group(1))
+                    count = _parse_status_count(data[0])
+                    if count is not None:
+                        return count
             except Exception as e:
                 logging.debug(f"STATUS command failed for {folder_name}: {e}")
             
             # Fallback to SELECT method (slower but more reliable)
             if self.imap_connection.select_folder(folder_name):
-                # Get count from SELECT response which is already available
-                # The select_folder method logs "Total emails: X" - we can use that
-                # But for now, let's use a quick search
-                result, email_ids = connection.search(None, 'ALL')
-                if result == 'OK' and email_ids[0]:
-                    return len(email_ids[0].split())
+                # SELECT already reported the message count as an untagged EXISTS
+                result, data = connection.response('EXISTS')
+                if data and data[-1] is not None:
+                    return int(data[-1])
             
             return 0
             
@@ -460,67 +1054,137 @@ class EmailOperations:
             logging.debug(f"Error getting email count for {folder_name}: {e}")
             return 0
     
-    def get_folders_with_counts(self, folders, timeout_per_folder=5):
-        """Get folder names with their email counts with timeout protection."""
-        import time
+    def get_folders_with_counts(self, folders):
+        """
+        Get folder names with their email counts.
+        
+        Counts the connection cached within the last few minutes are reused.
+        Otherwise a single LIST-STATUS command (RFC 5819) is used when the server supports it.
+        Folders it does not cover are probed with STATUS, pipelined into one
+        write when the connection allows it.
+        
+        Returns:
+            dict: Folder name -> FolderCount (count set, or error describing why not)
+        """
+        folder_counts = {}
+        
+        # Counts seen recently (this session or a previous one) need no round trip
+        get_cached_count = getattr(self.imap_connection, 'get_cached_count', None)
+        if get_cached_count is not None:
+            for folder in folders:
+                count = get_cached_count(folder)
+                if count is not None:
+                    folder_counts[folder] = FolderCount(count=count)
+            folders = [folder for folder in folders if folder not in folder_counts]
+            if not folders:
+                return folder_counts
+        
+        fetched_counts = self._fetch_folder_counts(folders)
+        
+        cache_folder_count = getattr(self.imap_connection, 'cache_folder_count', None)
+        if cache_folder_count is not None:
+            for folder, folder_count in fetched_counts.items():
+                if folder_count.count is not None:
+                    cache_folder_count(folder, folder_count.count)
+        
+        folder_counts.update(fetched_counts)
+        return folder_counts
+    
+    def _fetch_folder_counts(self, folders):
+        """Ask the server for folder counts: LIST-STATUS, then pipelined or sequential STATUS."""
         folder_counts = {}
         
+        # One LIST-STATUS command fills the connection's count cache for every folder
+        refresh_folder_counts = getattr(self.imap_connection, 'refresh_folder_counts', None)
+        if refresh_folder_counts is not None and refresh_folder_counts():
+            for folder in folders:
+                count = self.imap_connection.get_cached_count(folder)
+                if count is not None:
+                    folder_counts[folder] = FolderCount(count=count)
+            missing = [folder for folder in folders if folder not in folder_counts]
+            if not missing:
+                return folder_counts
+            logging.debug(f"LIST-STATUS did not report {len(missing)} folders, probing them individually")
+            folders = missing
+        
+        connection = self.imap_connection.get_connection()
+        if connection is not None and hasattr(connection, 'pipeline'):
+            folder_counts.update(self._pipelined_status_counts(connection, folders))
+            return folder_counts
+        
         for folder in folders:
-            start_time = time.time()
             try:
-                count = self.get_folder_email_count(folder)
-                folder_counts[folder] = count
-                elapsed = time.time() - start_time
-                logging.debug(f"Folder {folder}: {count} emails ({elapsed:.1f}s)")
-                
-                # Skip remaining folders if this one took too long
-                if elapsed > timeout_per_folder:
-                    logging.warning(f"Folder counting is slow, skipping remaining folders")
-                    # Set remaining folders to "?" or -1 to indicate unknown
-                    remaining_folders = folders[folders.index(folder) + 1:]
-                    for remaining in remaining_folders:
-                        folder_counts[remaining] = -1
-                    break
-                    
+                folder_counts[folder] = FolderCount(count=self.get_folder_email_count(folder))
             except Exception as e:
                 logging.debug(f"Error counting emails in {folder}: {e}")
-                folder_counts[folder] = -1  # Indicate error
+                folder_counts[folder] = FolderCount(error=str(e))
         
         return folder_counts
     
+    def _pipelined_status_counts(self, connection, folders):
+        """Send one STATUS per folder in a single write and read back the counts."""
+        commands = [('STATUS', folder if folder.startswith('"') else f'"{folder}"', '(MESSAGES)')
+                    for folder in folders]
+        try:
+            results = connection.pipeline(commands)
+        except Exception as e:
+            logging.debug(f"Pipelined STATUS failed: {e}")
+            return {folder: FolderCount(error=str(e)) for folder in folders}
+        
+        folder_counts = {}
+        for folder, (typ, data) in zip(folders, results):
+            count = _parse_status_count(data[-1]) if typ == 'OK' and data else None
+            if count is not None:
+                folder_counts[folder] = FolderCount(count=count)
+            else:
+                logging.debug(f"STATUS command failed for {folder}: {data}")
+                folder_counts[folder] = FolderCount(error='status failed')
+        return folder_counts
+    
+    def server_supports(self, connection, capability):
+        """
+        Check whether the logged-in server advertises an IMAP capability.
+        
+        Gmail only advertises its extensions after login, so CAPABILITY is asked
+        again once per connection rather than trusting the greeting.
+        """
+        if self._capabilities_for is not connection:
+            try:
+                if hasattr(connection, 'authenticated_capabilities'):
+                    # Usually already known from the LOGIN reply
+                    names = connection.authenticated_capabilities()
+                else:
+                    typ, dat = connection.capability()
+                    names = dat[-1].decode().upper().split() if typ == 'OK' and dat and dat[-1] else []
+            except Exception as e:
+                logging.debug(f"CAPABILITY failed: {e}")
+                names = []
+            self._capabilities = frozenset(names)
+            self._capabilities_for = connection
+        return capability in self._capabilities
+    
     def get_gmail_source_folders(self):
         """Get list of Gmail folders where emails actually live (not All Mail)."""
         try:
             all_folders = self.imap_connection.list_folders()
             
+            all_set = set(all_folders)
+            
             # Filter out All Mail and system folders, keep actual email folders
             source_folders = []
             
             # Always include INBOX
-            if 'INBOX' in all_folders:
+            if 'INBOX' in all_set:
                 source_folders.append('INBOX')
             
             # Include other Gmail folders where emails actually live
-            gmail_source_patterns = [
-                '[Gmail]/Sent Mail',
-                '[Google Mail]/Sent Mail', 
-                '[Gmail]/Drafts',
-                '[Google Mail]/Drafts',
-                '[Gmail]/Spam',
-                '[Google Mail]/Spam'
-            ]
-            
-            for pattern in gmail_source_patterns:
-                if pattern in all_folders:
-                    source_folders.append(pattern)
-            
-            # Include custom labels/folders (non-Gmail system folders)
-            for folder in all_folders:
-                if (not folder.startswith('[Gmail]') and 
-                    not folder.startswith('[Google Mail]') and 
-                    folder != 'INBOX' and
-                    folder not in source_folders):
-                    source_folders.append(folder)
+            source_folders.extend(pattern for pattern in self._GMAIL_SOURCE_FOLDERS if pattern in all_set)
+            
+            # Include custom labels/folders (non-Gmail system folders), once each
+            source_folders.extend(dict.fromkeys(
+                folder for folder in all_folders
+                if folder != 'INBOX' and not folder.startswith(('[Gmail]', '[Google Mail]'))
+            ))
             
             logging.info(f"Identified {len(source_folders)} source folders: {source_folders}")
             return source_folders
@@ -553,11 +1217,7 @@ class EmailOperations:
         logging.info(f"Found {len(email_folder_pairs)} emails to permanently delete")
         
         # Group by folder and process
-        folder_groups = {}
-        for email_id, folder in email_folder_pairs:
-            if folder not in folder_groups:
-                folder_groups[folder] = []
-            folder_groups[folder].append(email_id)
+        folder_groups = _group_by_folder(email_folder_pairs)
         
         total_deleted = 0
         
@@ -571,11 +1231,11 @@ class EmailOperations:
                 continue
             
             # Delete emails (standard deletion works for source folders)
-            deleted_count = self.delete_emails_bulk(email_ids)
+            batch_counts, expunged = self.delete_batches_and_expunge([email_ids])
+            deleted_count = sum(batch_counts)
             
             if deleted_count > 0:
-                logging.info(f"Expunging {deleted_count} emails from {folder}...")
-                if self.expunge_deleted_emails():
+                if expunged:
                     logging.info(f"✓ {folder}: {deleted_count} emails permanently deleted")
                 else:
                     logging.warning(f"⚠ Expunge may have failed for {folder}")
@@ -624,11 +1284,7 @@ class EmailOperations:
         logging.info(f"Deleting {len(email_folder_pairs)} emails in bulk across {len(folders)} folder(s)...")
         
         # Group emails by folder
-        folder_groups = {}
-        for email_id, folder in email_folder_pairs:
-            if folder not in folder_groups:
-                folder_groups[folder] = []
-            folder_groups[folder].append(email_id)
+        folder_groups = _group_by_folder(email_folder_pairs)
         
         total_deleted = 0
         
@@ -659,11 +1315,8 @@ class EmailOperations:
                     logging.error(f"Failed to process emails in {folder}")
             else:
                 # Standard deletion for non-All Mail folders
-                deleted_count = self.delete_emails_bulk(email_ids)
-                
-                if deleted_count > 0:
-                    logging.info(f"Expunging {deleted_count} emails from {folder}...")
-                    self.expunge_deleted_emails()
+                batch_counts, _ = self.delete_batches_and_expunge([email_ids])
+                deleted_count = sum(batch_counts)
                 
                 total_deleted += deleted_count
                 logging.info(f"✓ {folder}: {deleted_count} emails deleted")
@@ -673,8 +1326,23 @@ class EmailOperations:
         
         return total_deleted
     
-    def search_unsubscribe_emails(self):
-        """Search for emails containing 'unsubscribe' in subject or body."""
+    def search_unsubscribe_emails(self, since=None, before=None):
+        """
+        Search for emails with 'unsubscribe' in the subject or a List-Unsubscribe header.
+        
+        Args:
+            since (str): Only match emails on or after this date (DD-MMM-YYYY)
+            before (str): Only match emails before this date (DD-MMM-YYYY)
+            
+        Returns:
+            list: Matching email ids as strings
+        """
+        # connect() leaves no folder selected; search INBOX unless a folder was chosen
+        if getattr(self.imap_connection, 'selected_folder', 'INBOX') is None:
+            if not self.imap_connection.select_folder('INBOX'):
+                logging.error("Could not select INBOX for unsubscribe email search")
+                return []
+        
         connection = self.imap_connection.get_connection()
         if not connection:
             logging.error("No active IMAP connection for unsubscribe email search")
@@ -683,30 +1351,28 @@ class EmailOperations:
         try:
             logging.info("Searching for emails containing 'unsubscribe'...")
             
-            # Search for "unsubscribe" in subject
-            result1, subject_ids = connection.search(None, 'SUBJECT', 'unsubscribe')
-            
-            # Search for "unsubscribe" in body text
-            result2, body_ids = connection.search(None, 'BODY', 'unsubscribe')
+            # Bulk senders set List-Unsubscribe (RFC 2369); probing that header is far
+            # cheaper than a server-side BODY scan. One OR search returns each id once,
+            # and date criteria let the server prune by internal date first.
+            criteria = []
+            if since:
+                criteria += ['SINCE', since]
+            if before:
+                criteria += ['BEFORE', before]
+            criteria += ['OR', 'SUBJECT', 'unsubscribe', 'HEADER', 'List-Unsubscribe', '""']
+            try:
+                result, email_ids = connection.search(None, *criteria)
+            except CONNECTION_LOST_ERRORS as e:
+                connection = self._reconnect_after_abort(e)
+                if not connection:
+                    return []
+                result, email_ids = connection.search(None, *criteria)
             
-            if result1 != 'OK' or result2 != 'OK':
+            if result != 'OK':
                 logging.error("Failed to search for unsubscribe emails")
                 return []
             
-            # Combine and deduplicate results
-            all_ids = set()
-            
-            if subject_ids[0]:
-                subject_list = subject_ids[0].split()
-                all_ids.update(id.decode() for id in subject_list)
-                logging.info(f"Found {len(subject_list)} emails with 'unsubscribe' in subject")
-            
-            if body_ids[0]:
-                body_list = body_ids[0].split()
-                all_ids.update(id.decode() for id in body_list)
-                logging.info(f"Found {len(body_list)} emails with 'unsubscribe' in body")
-            
-            unique_ids = list(all_ids)
+            unique_ids = [email_id.decode() for email_id in email_ids[0].split()] if email_ids[0] else []
             logging.info(f"Total unique unsubscribe emails found: {len(unique_ids)}")
             
             return unique_ids
@@ -720,42 +1386,293 @@ class EmailOperations:
     
     def get_email_content(self, email_id):
         """Extract the full content of an email for link processing."""
+        return "\n".join(self.iter_email_text_parts(email_id))
+    
+    def iter_email_text_parts(self, email_id):
+        """Yield the decoded text/plain and text/html parts of one email."""
+        for _, parts in self.get_email_text_parts_bulk([email_id]):
+            yield from parts
+    
+    def get_email_contents_bulk(self, email_ids, batch_size=None):
+        """
+        Fetch the text content of many emails as one string each.
+        
+        Yields:
+            tuple: (email_id, content) for every requested id; content is "" on failure
+        """
+        for email_id, parts in self.get_email_text_parts_bulk(email_ids, batch_size):
+            yield email_id, "\n".join(parts)
+    
+    def get_email_text_parts_bulk(self, email_ids, batch_size=None, keyword=None):
+        """
+        Fetch the text parts of many emails, a batch at a time.
+        
+        Only the text/plain and text/html parts located through BODYSTRUCTURE are
+        downloaded (with BODY.PEEK, so nothing is marked as read); attachments
+        never cross the wire. Messages whose structure cannot be parsed fall back
+        to a full RFC822 fetch.
+        
+        Args:
+            email_ids (list): Message ids as str or bytes
+            batch_size (int): Messages per FETCH (defaults to CONTENT_FETCH_BATCH_SIZE)
+            keyword (bytes): If given, skip decoding sections whose encoded text
+                does not contain it (case-insensitive); base64 sections are always decoded
+            
+        Yields:
+            tuple: (email_id, list of decoded part strings) for every requested id;
+            the list is empty on failure
+        """
+        if not email_ids:
+            return
+        
         connection = self.imap_connection.get_connection()
         if not connection:
             logging.error("No active IMAP connection for content extraction")
-            return ""
+            return
         
-        try:
-            result, email_data = connection.fetch(email_id, '(RFC822)')
+        batch_size = batch_size or self.CONTENT_FETCH_BATCH_SIZE
+        batches = [email_ids[start:start + batch_size] for start in range(0, len(email_ids), batch_size)]
+        
+        if len(batches) > 1:
+            pool = self._open_content_pool(min(self.CONTENT_FETCH_CONNECTIONS, len(batches)))
+            if pool:
+                yield from self._iter_text_batches_parallel(pool, batches, keyword)
+                return
+        
+        for batch in batches:
+            text_parts = {}
             
+            try:
+                if connection:
+                    try:
+                        text_parts = self._fetch_text_batch(connection, batch, keyword)
+                    except CONNECTION_LOST_ERRORS as e:
+                        connection = self._reconnect_after_abort(e)
+                        if connection:
+                            text_parts = self._fetch_text_batch(connection, batch, keyword)
+                    
+            except Exception as e:
+                logging.warning(f"Error fetching content for emails {batch[0]}..{batch[-1]}: {e}")
+            
+            for email_id in batch:
+                yield email_id, text_parts.get(email_id, [])
+    
+    def _open_content_pool(self, size):
+        """
+        Open up to size extra connections on the currently selected folder.
+        
+        Returns:
+            list: Connected GmailIMAPConnection workers, or None if fewer than
+            two could be opened and the caller should fetch sequentially
+        """
+        credentials = [getattr(self.imap_connection, attr, None) for attr in ('email', 'password', 'server', 'port')]
+        folder = getattr(self.imap_connection, 'selected_folder', None)
+        if size < 2 or not all(credentials) or not folder:
+            return None
+        
+        def open_worker(_):
+            worker = GmailIMAPConnection(*credentials, persist_counts=False)
+            if worker.connect() and worker.select_folder(folder):
+                return worker
+            worker.disconnect()
+            return None
+        
+        with ThreadPoolExecutor(max_workers=size) as executor:
+            pool = [worker for worker in executor.map(open_worker, range(size)) if worker]
+        
+        if len(pool) < 2:
+            for worker in pool:
+                worker.disconnect()
+            return None
+        
+        logging.info(f"Fetching email content over {len(pool)} parallel connections")
+        return pool
+    
+    def _iter_text_batches_parallel(self, pool, batches, keyword=None):
+        """Fetch batches concurrently, one worker connection per thread, yielding in batch order."""
+        idle = list(pool)
+        
+        def fetch(batch):
+            # A thread takes a free connection for the batch and hands it back afterwards
+            worker = idle.pop()
+            try:
+                return self._fetch_text_batch(worker.connection, batch, keyword)
+            except Exception as e:
+                logging.warning(f"Error fetching content for emails {batch[0]}..{batch[-1]}: {e}")
+                return {}
+            finally:
+                idle.append(worker)
+        
+        try:
+            with ThreadPoolExecutor(max_workers=len(pool)) as executor:
+                # Keep only a couple of batches in flight per connection so bodies
+                # are not all held in memory ahead of the consumer
+                in_flight = deque()
+                remaining = iter(batches)
+                for batch in itertools.islice(remaining, 2 * len(pool)):
+                    in_flight.append((batch, executor.submit(fetch, batch)))
+                
+                while in_flight:
+                    batch, future = in_flight.popleft()
+                    text_parts = future.result()
+                    for next_batch in itertools.islice(remaining, 1):
+                        in_flight.append((next_batch, executor.submit(fetch, next_batch)))
+                    for email_id in batch:
+                        yield email_id, text_parts.get(email_id, [])
+        finally:
+            for worker in pool:
+                worker.disconnect()
+    
+    def _fetch_text_batch(self, connection, email_ids, keyword=None):
+        """Fetch the text parts of one batch: planned sections first, RFC822 for the rest."""
+        plans = self._fetch_text_sections(connection, email_ids)
+        text_parts = self._fetch_text_parts(connection, email_ids, plans, keyword)
+        
+        unparsed = [email_id for email_id in email_ids if plans.get(email_id) is None]
+        if unparsed:
+            text_parts.update(self._fetch_full_messages(connection, unparsed))
+        return text_parts
+    
+    def _reconnect_after_abort(self, error):
+        """
+        Reconnect once after the server dropped the connection mid-command.
+        
+        Returns:
+            imaplib.IMAP4_SSL: The new connection, or None if reconnecting failed
+        """
+        logging.warning(f"IMAP connection dropped ({error}), reconnecting")
+        if self.imap_connection.reconnect():
+            return self.imap_connection.connection
+        logging.error("Failed to re-establish the IMAP connection")
+        return None
+    
+    def _fetch_text_sections(self, connection, email_ids):
+        """
+        Fetch BODYSTRUCTURE for email_ids and work out which parts hold text.
+        
+        Returns:
+            dict: email_id -> [(section, encoding)]; ids whose structure could not be parsed are absent
+        """
+        wanted = {str(int(email_id)): email_id for email_id in email_ids}
+        plans = {}
+        
+        for sequence_set in _compress_to_sequence_set(email_ids):
+            result, email_data = connection.fetch(sequence_set, '(BODYSTRUCTURE)')
             if result != 'OK':
-                logging.warning(f"Failed to fetch email content for {email_id}")
-                return ""
+                logging.warning(f"Failed to fetch body structure for {sequence_set}")
+                continue
             
-            email_message = email.message_from_bytes(email_data[0][1])
+            for line in email_data:
+                # Literals inside a structure arrive as tuples; those use the RFC822 fallback
+                if not isinstance(line, bytes):
+                    continue
+                try:
+                    sequence_id, items = _parse_imap_list(line)[:2]
+                    body = items[items.index(b'BODYSTRUCTURE') + 1]
+                    plans[wanted[sequence_id.decode()]] = _text_sections(body)
+                except (KeyError, ValueError, IndexError, TypeError) as e:
+                    logging.debug(f"Could not parse body structure {line[:80]!r}: {e}")
+        
+        return plans
+    
+    def _fetch_text_parts(self, connection, email_ids, plans, keyword=None):
+        """
+        Download only the planned text sections, one FETCH per distinct section list.
+        
+        With a keyword, sections whose raw text lacks it are dropped undecoded.
+        """
+        keyword_re = re.compile(re.escape(keyword), re.IGNORECASE) if keyword else None
+        groups = defaultdict(list)
+        for email_id in email_ids:
+            plan = plans.get(email_id)
+            if plan is not None:
+                groups[tuple(plan)].append(email_id)
+        
+        text_parts = {}
+        for sections, group_ids in groups.items():
+            if not sections:
+                for email_id in group_ids:
+                    text_parts[email_id] = []
+                continue
             
-            content = ""
+            wanted = {str(int(email_id)): email_id for email_id in group_ids}
+            encodings = dict(sections)
+            items = '(' + ' '.join(f'BODY.PEEK[{section}]' for section, _ in sections) + ')'
             
-            if email_message.is_multipart():
-                for part in email_message.walk():
-                    content_type = part.get_content_type()
-                    if content_type in ['text/plain', 'text/html']:
+            for sequence_set in _compress_to_sequence_set(group_ids):
+                result, email_data = connection.fetch(sequence_set, items)
+                if result != 'OK':
+                    logging.warning(f"Failed to fetch email content for {sequence_set}")
+                    continue
+                
+                # Each message is one or more (b'<seq> (BODY[1] {n}', part_bytes) tuples then b')'
+                parts = defaultdict(dict)
+                email_id = None
+                for part in email_data:
+                    if not isinstance(part, tuple):
+                        continue
+                    sequence_match = _FETCH_SEQUENCE_RE.match(part[0])
+                    if sequence_match:
+                        email_id = wanted.get(sequence_match.group(1).decode())
+                    section_match = _FETCH_SECTION_RE.search(part[0])
+                    if email_id is not None and section_match:
+                        parts[email_id][section_match.group(1).decode()] = part[1]
+                
+                for email_id, section_bytes in parts.items():
+                    decoded = []
+                    for section, _ in sections:
                         try:
-                            payload = part.get_payload(decode=True)
+                            payload = section_bytes.get(section, b'')
+                            if keyword_re and not _may_contain(payload, encodings[section], keyword_re):
+                                continue
+                            payload = _decode_transfer_encoding(payload, encodings[section])
                             if payload:
-                                content += payload.decode('utf-8', errors='ignore') + "\n"
+                                decoded.append(payload.decode('utf-8', errors='ignore'))
                         except Exception as e:
                             logging.debug(f"Error decoding email part: {e}")
-            else:
-                try:
-                    payload = email_message.get_payload(decode=True)
-                    if payload:
-                        content = payload.decode('utf-8', errors='ignore')
-                except Exception as e:
-                    logging.debug(f"Error decoding email content: {e}")
+                    text_parts[email_id] = decoded
+        
+        return text_parts
+    
+    def _fetch_full_messages(self, connection, email_ids):
+        """Fetch whole messages with RFC822 and extract their text parts."""
+        wanted = {str(int(email_id)): email_id for email_id in email_ids}
+        text_parts = {}
+        
+        for sequence_set in _compress_to_sequence_set(email_ids):
+            result, email_data = connection.fetch(sequence_set, '(RFC822)')
             
-            return content
+            if result != 'OK':
+                logging.warning(f"Failed to fetch email content for {sequence_set}")
+                continue
             
-        except Exception as e:
-            logging.warning(f"Error extracting content for email {email_id}: {e}")
-            return ""
\ No newline at end of file
+            # Responses alternate between (b'<seq> (RFC822 {n}', message_bytes) tuples and b')'
+            for part in email_data:
+                if not isinstance(part, tuple):
+                    continue
+                email_id = wanted.get(part[0].split(None, 1)[0].decode())
+                if email_id is None:
+                    continue
+                try:
+                    text_parts[email_id] = self._extract_text_parts(part[1])
+                except Exception as e:
+                    logging.warning(f"Error extracting content for email {email_id}: {e}")
+        
+        return text_parts
+    
+    def _extract_text_parts(self, message_bytes):
+        """Decode the text/plain and text/html parts of a raw message."""
+        email_message = _parse_message_bytes(message_bytes)
+        
+        text_parts = []
+        
+        # A single-part message is its own (and only) candidate leaf
+        for part in _select_text_parts(email_message):
+            try:
+                payload = part.get_payload(decode=True)
+                if payload:
+                    text_parts.append(payload.decode('utf-8', errors='ignore'))
+            except Exception as e:
+                logging.debug(f"Error decoding email part: {e}")
+        
+        return text_parts
@@ -11,6 +11,7 @@ import datetime
 import logging
 import json
 import base64
+import functools
 from pathlib import Path
 from typing import Dict, Any, Optional
 from dataclasses import dataclass, asdict
@@ -31,10 +32,32 @@ except ImportError:
 try:
     import yaml
     YAML_AVAILABLE = True
+    # Prefer the libyaml C bindings when PyYAML was built with them
+    YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    YAML_DUMPER = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
 except ImportError:
     YAML_AVAILABLE = False
 
 
+def _to_bool(value: str) -> bool:
+    """Interpret an environment variable value as a boolean flag."""
+    return value.lower() == 'true'
+
+
+# (CleanerConfig field, environment variable, default, converter) for get_config_from_env
+_ENV_SCHEMA = (
+    ('cutoff_date', 'DEFAULT_CUTOFF_DATE', '01-Jan-2023', str),
+    ('folders', 'DEFAULT_FOLDER', 'INBOX', lambda value: [value]),
+    ('dry_run', 'DRY_RUN', 'false', _to_bool),
+    ('backup_before_delete', 'BACKUP_BEFORE_DELETE', 'true', _to_bool),
+    ('max_batch_size', 'DEFAULT_BATCH_SIZE', '500', int),
+    ('request_delay', 'REQUEST_DELAY', '1', int),
+    ('http_timeout', 'HTTP_TIMEOUT', '10', int),
+    ('enable_analytics', 'ENABLE_ANALYTICS', 'true', _to_bool),
+    ('log_level', 'LOG_LEVEL', 'INFO', str),
+)
+
+
 @dataclass
 class CleanerConfig:
     """Configuration data class for type safety and validation."""
@@ -59,6 +82,31 @@ class CredentialManager:
         self.storage_path.mkdir(exist_ok=True)
         self.key_file = self.storage_path / "key.key"
         self.cred_file = self.storage_path / "credentials.enc"
+        self._fernet: Optional["Fernet"] = None
+    
+    def _get_fernet(self) -> "Fernet":
+        """
+        Get the Fernet instance, reading or creating the key only once.
+        
+        The key file holds a raw Fernet key, so no password-based key derivation
+        runs here. Any future password-derived key must be derived once and cached
+        in this instance rather than re-derived for each encrypt/decrypt.
+        """
+        if self._fernet is None:
+            self._fernet = Fernet(self._get_or_create_key())
+        return self._fernet
+    
+    @staticmethod
+    def _write_private_file(path: Path, data: bytes):
+        """Atomically write data to path, readable only by the owner from the moment it exists."""
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        fd = os.open(str(tmp_path), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            os.write(fd, data)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, path)
     
     def _get_or_create_key(self) -> bytes:
         """Get existing encryption key or create a new one."""
@@ -70,10 +118,7 @@ class CredentialManager:
                 return f.read()
         else:
             key = Fernet.generate_key()
-            with open(self.key_file, 'wb') as f:
-                f.write(key)
-            # Set restrictive permissions
-            os.chmod(self.key_file, 0o600)
+            self._write_private_file(self.key_file, key)
             return key
     
     def store_credentials(self, email: str, password: str, encrypt: bool = True) -> bool:
@@ -82,23 +127,16 @@ class CredentialManager:
             credentials = {"email": email, "password": password}
             
             if encrypt and CRYPTO_AVAILABLE:
-                key = self._get_or_create_key()
-                fernet = Fernet(key)
+                fernet = self._get_fernet()
                 
-                cred_json = json.dumps(credentials)
+                cred_json = json.dumps(credentials, separators=(',', ':'))
                 encrypted_data = fernet.encrypt(cred_json.encode())
                 
-                with open(self.cred_file, 'wb') as f:
-                    f.write(encrypted_data)
-                
-                os.chmod(self.cred_file, 0o600)
+                self._write_private_file(self.cred_file, encrypted_data)
                 logging.info("Credentials stored with encryption")
             else:
                 # Store as plain JSON (not recommended for production)
-                with open(self.cred_file.with_suffix('.json'), 'w') as f:
-                    json.dump(credentials, f, indent=2)
-                
-                os.chmod(self.cred_file.with_suffix('.json'), 0o600)
+                self._write_private_file(self.cred_file.with_suffix('.json'), json.dumps(credentials, indent=2).encode())
                 logging.warning("Credentials stored without encryption")
             
             return True
@@ -112,14 +150,13 @@ class CredentialManager:
         try:
             # Try encrypted file first
             if self.cred_file.exists() and CRYPTO_AVAILABLE:
-                key = self._get_or_create_key()
-                fernet = Fernet(key)
+                fernet = self._get_fernet()
                 
                 with open(self.cred_file, 'rb') as f:
                     encrypted_data = f.read()
                 
                 decrypted_data = fernet.decrypt(encrypted_data)
-                credentials = json.loads(decrypted_data.decode())
+                credentials = json.loads(decrypted_data)
                 
                 logging.info("Loaded encrypted credentials")
                 return credentials
@@ -127,7 +164,7 @@ class CredentialManager:
             # Fallback to plain JSON
             json_file = self.cred_file.with_suffix('.json')
             if json_file.exists():
-                with open(json_file, 'r') as f:
+                with open(json_file, 'rb') as f:
                     credentials = json.load(f)
                 
                 logging.info("Loaded plain text credentials")
@@ -144,6 +181,7 @@ class CredentialManager:
         try:
             files_to_delete = [self.key_file, self.cred_file, self.cred_file.with_suffix('.json')]
             deleted_count = 0
+            self._fernet = None
             
             for file_path in files_to_delete:
                 if file_path.exists():
@@ -162,6 +200,20 @@ class CredentialManager:
             return False
 
 
+@functools.lru_cache(maxsize=1)
+def _load_environment_once():
+    """Load the .env file the first time any config manager asks for it."""
+    if DOTENV_AVAILABLE:
+        env_file = Path('.env')
+        if env_file.exists():
+            load_dotenv()
+            logging.info("Loaded configuration from .env file")
+        else:
+            logging.info("No .env file found, using system environment variables")
+    else:
+        logging.info("python-dotenv not available, using system environment variables only")
+
+
 class EnhancedConfigManager:
     """Enhanced configuration manager with multiple sources."""
     
@@ -170,16 +222,8 @@ class EnhancedConfigManager:
         self.credential_manager = CredentialManager()
         
     def load_environment(self):
-        """Load environment variables from .env file if available."""
-        if DOTENV_AVAILABLE:
-            env_file = Path('.env')
-            if env_file.exists():
-                load_dotenv()
-                logging.info("Loaded configuration from .env file")
-            else:
-                logging.info("No .env file found, using system environment variables")
-        else:
-            logging.info("python-dotenv not available, using system environment variables only")
+        """Load environment variables from .env file if available (once per process)."""
+        _load_environment_once()
     
     def get_config_from_env(self) -> Optional[CleanerConfig]:
         """Get configuration from environment variables."""
@@ -190,18 +234,12 @@ class EnhancedConfigManager:
             if not email or not password:
                 return None
             
+            environ = os.environ
             config = CleanerConfig(
                 email=email,
                 password=password,
-                cutoff_date=os.getenv('DEFAULT_CUTOFF_DATE', '01-Jan-2023'),
-                folders=[os.getenv('DEFAULT_FOLDER', 'INBOX')],
-                dry_run=os.getenv('DRY_RUN', 'false').lower() == 'true',
-                backup_before_delete=os.getenv('BACKUP_BEFORE_DELETE', 'true').lower() == 'true',
-                max_batch_size=int(os.getenv('DEFAULT_BATCH_SIZE', '500')),
-                request_delay=int(os.getenv('REQUEST_DELAY', '1')),
-                http_timeout=int(os.getenv('HTTP_TIMEOUT', '10')),
-                enable_analytics=os.getenv('ENABLE_ANALYTICS', 'true').lower() == 'true',
-                log_level=os.getenv('LOG_LEVEL', 'INFO')
+                **{field: cast(environ.get(env_var, default))
+                   for field, env_var, default, cast in _ENV_SCHEMA}
             )
             
             logging.info("Configuration loaded from environment variables")
@@ -335,7 +373,7 @@ def load_yaml_rules(rules_path: str = "./rules.yaml") -> Optional[Dict[str, Any]
     
     try:
         with open(rules_file, 'r', encoding='utf-8') as f:
-            rules = yaml.safe_load(f)
+            rules = yaml.load(f, Loader=YAML_LOADER)
         
         logging.info(f"Loaded rules configuration from {rules_path}")
         return rules
@@ -421,7 +459,7 @@ def create_default_rules_file(rules_path: str = "./rules.yaml"):
     
     try:
         with open(rules_path, 'w', encoding='utf-8') as f:
-            yaml.dump(default_rules, f, default_flow_style=False, indent=2)
+            yaml.dump(default_rules, f, Dumper=YAML_DUMPER, default_flow_style=False, indent=2)
         
         logging.info(f"Created default rules file at {rules_path}")
         return True
@@ -436,17 +474,29 @@ class EnhancedConfig:
     
     def __init__(self):
         self.config_manager = EnhancedConfigManager()
-        self.rules = None
         
-        # Load rules if available
-        rules_path = os.getenv('RULES_CONFIG_PATH', './rules.yaml')
-        self.rules = load_yaml_rules(rules_path)
-        
-        # Create default rules file if none exists
+        # Rules are parsed on first access so credential-only callers skip the YAML load
+        self._rules_path = os.getenv('RULES_CONFIG_PATH', './rules.yaml')
+        self._rules = None
+        self._rules_loaded = False
+        self._rule_cache: Dict[tuple, Any] = {}
+    
+    @property
+    def rules(self) -> Optional[Dict[str, Any]]:
+        """Rules configuration, loaded from the rules file the first time it is needed."""
+        if not self._rules_loaded:
+            self._rules = load_yaml_rules(self._rules_path)
+            self._rules_loaded = True
+            self._rule_cache = {}
+        return self._rules
+    
+    def ensure_rules_file(self) -> Optional[Dict[str, Any]]:
+        """Offer to create a default rules file when none exists, then return the rules."""
         if not self.rules and YAML_AVAILABLE:
             if input("Create default rules file? (y/n): ").lower().startswith('y'):
-                create_default_rules_file(rules_path)
-                self.rules = load_yaml_rules(rules_path)
+                create_default_rules_file(self._rules_path)
+                self._rules_loaded = False
+        return self.rules
     
     def get_config(self, use_env: bool = True, use_stored: bool = True) -> CleanerConfig:
         """Get configuration with flexible source selection."""
@@ -463,10 +513,17 @@ class EnhancedConfig:
         return self.config_manager.get_interactive_config()
     
     def get_rule(self, rule_type: str, rule_name: str = None) -> Optional[Dict[str, Any]]:
-        """Get specific rule from rules configuration."""
+        """Get specific rule from rules configuration (cached per rule type and name)."""
         if not self.rules:
             return None
         
+        key = (rule_type, rule_name)
+        if key not in self._rule_cache:
+            self._rule_cache[key] = self._lookup_rule(rule_type, rule_name)
+        return self._rule_cache[key]
+    
+    def _lookup_rule(self, rule_type: str, rule_name: str = None) -> Optional[Dict[str, Any]]:
+        """Find a rule section, or one named rule within it, in the loaded rules."""
         try:
             rules_section = self.rules.get('email_rules', {}).get(rule_type, [])
             
@@ -514,10 +571,22 @@ class EnhancedConfig:
             return False
 
 
+# Shared by the backward compatible helpers so retries reuse one configuration
+_ENHANCED_CONFIG: Optional[EnhancedConfig] = None
+
+
+def _get_enhanced_config() -> EnhancedConfig:
+    """Get the process-wide EnhancedConfig, creating it on first use."""
+    global _ENHANCED_CONFIG
+    if _ENHANCED_CONFIG is None:
+        _ENHANCED_CONFIG = EnhancedConfig()
+    return _ENHANCED_CONFIG
+
+
 # Backward compatibility functions
 def get_user_input():
     """Backward compatible function for existing code."""
-    config_manager = EnhancedConfig()
+    config_manager = _get_enhanced_config()
     config = config_manager.get_config()
     
     # Convert to old format for compatibility
@@ -31,7 +31,7 @@ except ImportError:
     console = None
 
 from imap_connection import GmailIMAPConnection
-from email_operations import EmailOperations
+from email_operations import EmailOperations, FolderCount
 from unsubscribe_processor import UnsubscribeProcessor
 
 # Default configuration
@@ -417,9 +417,9 @@ class GmailSession:
         if get_counts:
             # Get email counts for all folders (with timeout protection)
             self.print_styled("Getting email counts for folders (this may take a moment)...", "info")
-            folder_counts = self.email_ops.get_folders_with_counts(self.available_folders, timeout_per_folder=3)
+            folder_counts = self.email_ops.get_folders_with_counts(self.available_folders)
         else:
-            folder_counts = {folder: -2 for folder in self.available_folders}  # -2 = skipped
+            folder_counts = {folder: FolderCount(error='skipped') for folder in self.available_folders}
         
         if RICH_AVAILABLE:
             folder_table = Table(title="Gmail Folders")
@@ -430,15 +430,16 @@ class GmailSession:
             
             for i, folder in enumerate(self.available_folders, 1):
                 folder_type = "System" if folder.startswith('[Gmail]') else "Custom"
-                email_count = folder_counts.get(folder, 0)
+                folder_count = folder_counts.get(folder, FolderCount(count=0))
+                email_count = folder_count.count
                 
                 # Format email count
-                if email_count == -1:
-                    count_display = "?"
-                    count_style = "?"
-                elif email_count == -2:
+                if folder_count.error == 'skipped':
                     count_display = "-"
                     count_style = "-"
+                elif email_count is None:
+                    count_display = "?"
+                    count_style = "?"
                 else:
                     count_display = f"{email_count:,}"
                     count_style = f"[bold]{email_count:,}[/bold]" if folder == self.current_folder else f"{email_count:,}"
@@ -457,24 +458,25 @@ class GmailSession:
             for i, folder in enumerate(self.available_folders, 1):
                 current_marker = " (current)" if folder == self.current_folder else ""
                 folder_type = "System" if folder.startswith('[Gmail]') else "Custom"
-                email_count = folder_counts.get(folder, 0)
+                folder_count = folder_counts.get(folder, FolderCount(count=0))
                 folder_display = f"{folder}{current_marker}"
                 
                 # Format email count
-                if email_count == -1:
-                    count_display = "?"
-                elif email_count == -2:
+                if folder_count.error == 'skipped':
                     count_display = "-"
+                elif folder_count.count is None:
+                    count_display = "?"
                 else:
-                    count_display = f"{email_count:,}"
+                    count_display = f"{folder_count.count:,}"
                 
                 print(f"{i:<4} {folder_display:<35} {count_display:<10} {folder_type}")
             print("-" * 80)
         
         # Show notes about count symbols
-        if -1 in folder_counts.values():
+        errors = {folder_count.error for folder_count in folder_counts.values() if folder_count.count is None}
+        if errors - {'skipped'}:
             self.print_styled("Note: '?' indicates folders where count couldn't be determined quickly", "info")
-        if -2 in folder_counts.values():
+        if 'skipped' in errors:
             self.print_styled("Note: '-' indicates email counts were skipped for faster display", "info")    
 
     def change_current_folder(self):
@@ -706,7 +708,14 @@ class GmailSession:
         try:
             while True:
                 self.show_main_menu()
-                choice = self.get_menu_choice()
+                
+                # Idle while the user decides, so the server pushes changes and keeps the link alive
+                idling = self.connection.start_idle()
+                try:
+                    choice = self.get_menu_choice()
+                finally:
+                    if idling:
+                        self.connection.stop_idle()
                 
                 if choice == 1:
                     self.delete_old_emails()
@@ -734,6 +743,8 @@ class GmailSession:
         
         finally:
             # Clean disconnect
+            if self.unsubscribe_proc:
+                self.unsubscribe_proc.close()
             if self.connection:
                 self.connection.disconnect()
                 self.print_styled("✅ Disconnected from Gmail", "success")
@@ -6,8 +6,379 @@ Handles Gmail IMAP connection, authentication, and session management.
 """
 
 import imaplib
+import json
+import os
+import re
 import ssl
 import logging
+import socket
+import tempfile
+import threading
+import time
+import zlib
+from pathlib import Path
+
+# imaplib only accepts commands it knows about; COMPRESS (RFC 4978) is valid once authenticated
+imaplib.Commands.setdefault('COMPRESS', ('AUTH', 'SELECTED'))
+imaplib.Commands.setdefault('IDLE', ('AUTH', 'SELECTED'))
+
+# Read buffer for server responses; large FETCH/LIST replies then take few recv calls
+READ_BUFFER_SIZE = 64 * 1024
+
+# TCP keepalive probing: first probe after this many idle seconds, then at this interval.
+# Keeps NAT and firewall state alive between user actions so the session isn't dropped.
+TCP_KEEPALIVE_IDLE = 60
+TCP_KEEPALIVE_INTERVAL = 20
+
+# RFC 6154 special-use flag that identifies each well-known Gmail folder
+SPECIAL_USE_FLAGS = {
+    '[Gmail]/All Mail': '\\All',
+    '[Gmail]/Trash': '\\Trash',
+    '[Gmail]/Spam': '\\Junk',
+    '[Gmail]/Sent Mail': '\\Sent',
+    '[Gmail]/Drafts': '\\Drafts'
+}
+
+# Names tried for well-known folders on servers that do not send special-use flags
+FOLDER_VARIATIONS = {
+    '[Gmail]/All Mail': ('[Google Mail]/All Mail', 'All Mail'),
+    '[Gmail]/Trash': ('[Google Mail]/Bin', '[Gmail]/Bin', 'Trash'),
+    '[Gmail]/Spam': ('[Google Mail]/Spam', 'Spam'),
+    '[Gmail]/Sent Mail': ('[Google Mail]/Sent Mail', 'Sent'),
+    '[Gmail]/Drafts': ('[Google Mail]/Drafts', 'Drafts')
+}
+
+
+_ssl_context = None
+_ssl_context_lock = threading.Lock()
+
+
+def _get_ssl_context():
+    """Get the SSL context shared by all connections, loading the CA store only once."""
+    global _ssl_context
+    with _ssl_context_lock:
+        if _ssl_context is None:
+            _ssl_context = ssl.create_default_context()
+        return _ssl_context
+
+
+def _list_folder_name(line):
+    """Get the folder name, the last field of a LIST response line, or None."""
+    if line.endswith(b'"'):
+        # Quoted name: the text between the last two quotes; only it is decoded
+        return line.rsplit(b'"', 2)[-2].decode('utf-8')
+    parts = line.split()
+    return parts[-1].decode('utf-8') if len(parts) >= 3 else None
+
+
+# Untagged STATUS data: quoted or atom mailbox name followed by its attributes
+_LIST_STATUS_RE = re.compile(r'\s*(?:"((?:[^"\\]|\\.)*)"|(\S+))\s+\(.*?\bMESSAGES (\d+)')
+
+
+def _status_count(line):
+    """Get (folder name, message count) from a STATUS response line, or None."""
+    match = _LIST_STATUS_RE.match(line.decode('utf-8', 'replace'))
+    if not match:
+        return None
+    name = match.group(1) if match.group(1) is not None else match.group(2)
+    return name.replace('\\"', '"').replace('\\\\', '\\'), int(match.group(3))
+
+
+def _folder_sort_key(folder):
+    """Sort key putting INBOX first, then Gmail system folders, then user labels."""
+    if folder == 'INBOX':
+        return (0, folder)
+    if folder.startswith(('[Gmail]', '[Google Mail]')):
+        return (1, folder)
+    return (2, folder)
+
+
+def _quote_mailbox(name):
+    """Quote a mailbox name for a command line unless it is already quoted."""
+    if name.startswith('"'):
+        return name
+    return '"' + name.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+# Commands after which cached folder message counts can no longer be trusted
+MAILBOX_CHANGING_COMMANDS = frozenset({'STORE', 'EXPUNGE', 'COPY', 'MOVE', 'APPEND'})
+
+
+class PipelinedIMAP4_SSL(imaplib.IMAP4_SSL):
+    """
+    IMAP4_SSL with support for pipelining literal-free commands (RFC 3501 5.5)
+    and COMPRESS=DEFLATE (RFC 4978).
+    """
+    
+    # Seconds to wait for the server to finish IDLE after DONE before giving the link up
+    IDLE_DONE_TIMEOUT = 30
+    
+    def __init__(self, *args, **kwargs):
+        if kwargs.get('ssl_context') is None:
+            kwargs['ssl_context'] = _get_ssl_context()
+        self._pipeline_buffer = None
+        self._compressor = None
+        self._decompressor = None
+        self._inflated = bytearray()
+        self.last_response_time = time.monotonic()
+        self.mailbox_changes = 0
+        self._authenticated_capabilities = None
+        self._idle_tag = None
+        self._idle_thread = None
+        self._idle_error = None
+        super().__init__(*args, **kwargs)
+    
+    def open(self, host='', port=imaplib.IMAP4_SSL_PORT, *args, **kwargs):
+        """
+        Open the connection with Nagle's algorithm off, since IMAP traffic is many
+        small writes, TCP keepalive on, and a larger read buffer than imaplib's default.
+        """
+        # Python 3.9 added the timeout argument; pass through whatever this version accepts
+        super().open(host, port, *args, **kwargs)
+        # Nothing has been read yet, so the default-sized reader can simply be swapped
+        self.file.close()
+        self.file = self.sock.makefile('rb', buffering=READ_BUFFER_SIZE)
+        
+        options = [
+            (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+            (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+        ]
+        # The timing options are Linux names (macOS has TCP_KEEPALIVE for the idle time)
+        keepidle = getattr(socket, 'TCP_KEEPIDLE', None) or getattr(socket, 'TCP_KEEPALIVE', None)
+        if keepidle is not None:
+            options.append((socket.IPPROTO_TCP, keepidle, TCP_KEEPALIVE_IDLE))
+        if hasattr(socket, 'TCP_KEEPINTVL'):
+            options.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, TCP_KEEPALIVE_INTERVAL))
+        
+        for level, option, value in options:
+            try:
+                self.sock.setsockopt(level, option, value)
+            except OSError as e:
+                logging.debug(f"Could not set socket option {option}: {e}")
+    
+    def login(self, user, password):
+        """Log in, keeping any capability list the server volunteers with the reply."""
+        typ, dat = super().login(user, password)
+        # Gmail sends its post-login capabilities as an OK [CAPABILITY ...] response
+        # code, which saves asking for them again
+        _, capabilities = self.response('CAPABILITY')
+        if capabilities and capabilities[-1]:
+            self._authenticated_capabilities = frozenset(capabilities[-1].decode().upper().split())
+        return typ, dat
+    
+    def authenticated_capabilities(self):
+        """
+        Get the capabilities the server advertises after login.
+        
+        Returns:
+            frozenset: Upper-case capability names; asked for at most once per connection
+        """
+        if self._authenticated_capabilities is None:
+            typ, dat = self.capability()
+            names = dat[-1].decode().upper().split() if typ == 'OK' and dat and dat[-1] else []
+            self._authenticated_capabilities = frozenset(names)
+        return self._authenticated_capabilities
+    
+    def _command(self, name, *args):
+        """Send a command, counting the ones that can change folder contents."""
+        subcommand = args[0].upper() if name == 'UID' and args else name
+        if subcommand in MAILBOX_CHANGING_COMMANDS:
+            self.mailbox_changes += 1
+        return super()._command(name, *args)
+    
+    def _command_complete(self, name, tag):
+        """Complete a command and note when the server last answered."""
+        result = super()._command_complete(name, tag)
+        self.last_response_time = time.monotonic()
+        return result
+    
+    def send(self, data):
+        """Send data, or hold it back while a pipeline is being assembled."""
+        if self._pipeline_buffer is not None:
+            self._pipeline_buffer.append(data)
+        else:
+            self._write(data)
+    
+    def _write(self, data):
+        """Write data to the socket, deflating it once compression is active."""
+        if self._compressor is not None:
+            data = self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        super().send(data)
+    
+    def enable_compression(self):
+        """
+        Switch the connection to DEFLATE compression if the server offers it.
+        
+        Must be called after authentication. Message bodies, and HTML mail in
+        particular, shrink several times over on the wire.
+        
+        Returns:
+            bool: True if compression is now active, False otherwise
+        """
+        if self._compressor is not None:
+            return True
+        
+        if 'COMPRESS=DEFLATE' not in self.authenticated_capabilities():
+            return False
+        
+        typ, dat = self._simple_command('COMPRESS', 'DEFLATE')
+        if typ != 'OK':
+            return False
+        
+        # Raw DEFLATE streams (negative window bits) in both directions
+        self._compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+        self._decompressor = zlib.decompressobj(-15)
+        return True
+    
+    def start_idle(self):
+        """
+        Enter IDLE (RFC 2177) so the server pushes mailbox changes instead of being polled.
+        
+        A reader thread consumes the pushed untagged responses until stop_idle();
+        no other command may be sent in between.
+        
+        Returns:
+            bool: True if the server is now idling, False if IDLE is unsupported or refused
+        """
+        if self._idle_tag is not None:
+            return True
+        if 'IDLE' not in self.authenticated_capabilities():
+            return False
+        
+        # Forget EXISTS/EXPUNGE left over from earlier commands so only pushed ones count
+        self.response('EXISTS')
+        self.response('EXPUNGE')
+        
+        tag = self._command('IDLE')
+        while self._get_response() is not None:
+            if self.tagged_commands.get(tag):
+                # Refused with a tagged NO/BAD instead of a continuation
+                try:
+                    self._command_complete('IDLE', tag)
+                except self.error as e:
+                    logging.debug(f"IDLE refused: {e}")
+                return False
+        
+        self._idle_tag = tag
+        self._idle_error = None
+        self._idle_thread = threading.Thread(target=self._read_while_idle, args=(tag,), daemon=True)
+        self._idle_thread.start()
+        return True
+    
+    def _read_while_idle(self, tag):
+        """Store pushed responses until the server completes the IDLE command."""
+        try:
+            while not self.tagged_commands.get(tag):
+                self._get_response()
+        except Exception as e:
+            self._idle_error = e
+    
+    def stop_idle(self):
+        """
+        Leave IDLE and report whether the selected mailbox changed meanwhile.
+        
+        Returns:
+            bool: True if EXISTS or EXPUNGE was pushed while idling
+        """
+        if self._idle_tag is None:
+            return False
+        
+        tag, thread = self._idle_tag, self._idle_thread
+        finished = False
+        try:
+            self.send(b'DONE' + imaplib.CRLF)
+            thread.join(self.IDLE_DONE_TIMEOUT)
+            finished = not thread.is_alive()
+        finally:
+            self._idle_tag = None
+            self._idle_thread = None
+            if not finished:
+                # The link is dead; shutting the socket down unblocks the reader thread
+                try:
+                    self.sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        if not finished:
+            raise self.abort(f"no reply to DONE within {self.IDLE_DONE_TIMEOUT} seconds")
+        if self._idle_error is not None:
+            raise self.abort(f"connection lost while idling: {self._idle_error}")
+        
+        self._command_complete('IDLE', tag)
+        _, exists = self.response('EXISTS')
+        _, expunged = self.response('EXPUNGE')
+        return exists[-1] is not None or expunged[-1] is not None
+    
+    def _fill_inflated(self):
+        """Read one chunk from the socket and inflate it into the read buffer."""
+        chunk = self.file.read1(READ_BUFFER_SIZE)
+        if not chunk:
+            raise self.abort('socket error: EOF')
+        self._inflated += self._decompressor.decompress(chunk)
+    
+    def read(self, size):
+        """Read 'size' bytes from remote, inflating them if compression is active."""
+        if self._decompressor is None:
+            return super().read(size)
+        
+        while len(self._inflated) < size:
+            self._fill_inflated()
+        data = bytes(self._inflated[:size])
+        del self._inflated[:size]
+        return data
+    
+    def readline(self):
+        """Read a line from remote, inflating it if compression is active."""
+        if self._decompressor is None:
+            return super().readline()
+        
+        scanned = 0
+        while True:
+            end = self._inflated.find(b'\n', scanned)
+            if end >= 0:
+                line = bytes(self._inflated[:end + 1])
+                del self._inflated[:end + 1]
+                return line
+            if len(self._inflated) > imaplib._MAXLINE:
+                raise self.error("got more than %d bytes" % imaplib._MAXLINE)
+            scanned = len(self._inflated)
+            self._fill_inflated()
+    
+    def pipeline(self, commands):
+        """
+        Write several commands in one send and then collect their tagged responses.
+        
+        Args:
+            commands (list): (name, *args) tuples; arguments must not need literals
+            
+        Returns:
+            list: (type, data) result for each command, in order
+        """
+        self._pipeline_buffer = []
+        try:
+            tags = [(command, self._command(*command)) for command in commands]
+            data = b''.join(self._pipeline_buffer)
+        finally:
+            self._pipeline_buffer = None
+        self._write(data)
+        
+        results = []
+        for command, tag in tags:
+            # UID STORE / UID EXPUNGE answer with the same untagged data as the plain commands
+            name = command[1] if command[0] == 'UID' else command[0]
+            try:
+                typ, dat = self._command_complete(command[0], tag)
+            except self.abort:
+                raise
+            except self.error as e:
+                typ, dat = 'NO', [str(e).encode()]
+            if name in ('STORE', 'FETCH'):
+                typ, dat = self._untagged_response(typ, dat, 'FETCH')
+            elif name == 'EXPUNGE':
+                typ, dat = self._untagged_response(typ, dat, 'EXPUNGE')
+            elif name == 'STATUS':
+                typ, dat = self._untagged_response(typ, dat, 'STATUS')
+            results.append((typ, dat))
+        return results
 
 
 class GmailIMAPConnection:
@@ -15,28 +386,149 @@ class GmailIMAPConnection:
     Gmail IMAP connection manager with automatic reconnection and error handling.
     """
     
-    def __init__(self, email, password, server='imap.gmail.com', port=993):
+    # A connection that answered this recently is trusted without a NOOP round trip
+    KEEPALIVE_INTERVAL = 60
+    
+    # Folder message counts are reused for this many seconds, across sessions too.
+    # The file defaults to ~/.zeromail_cache.json, resolved when first used.
+    FOLDER_COUNT_CACHE_TTL = 300
+    FOLDER_COUNT_CACHE_FILE = None
+    
+    def __init__(self, email, password, server='imap.gmail.com', port=993, persist_counts=True):
         self.email = email
         self.password = password
         self.server = server
         self.port = port
         self.connection = None
+        self.selected_folder = None
+        self._folder_index = None
+        # Folder names as last listed, for callers that reuse one listing (see config.py)
+        self.folder_listing = None
+        # Helper connections that only read mail pass False: they neither load nor
+        # save the shared cache file
+        self.persist_counts = persist_counts
+        # When counts were last dropped (all of them, or per folder), so older saved
+        # entries are not merged back in
+        self._counts_cleared_at = 0.0
+        self._counts_forgotten_at = {}
+        self._folder_cache = self._load_folder_cache() if persist_counts else {}
     
-    def connect(self):
+    def _folder_cache_file(self):
+        """Get the folder count cache file path."""
+        return self.FOLDER_COUNT_CACHE_FILE or Path.home() / '.zeromail_cache.json'
+    
+    def _folder_cache_key(self):
+        """Key of this account's entries in the cache file, so each server keeps its own counts."""
+        return f"{self.server}:{self.port}:{self.email}"
+    
+    def _read_folder_cache_file(self):
+        """Read the whole cache file: server:port:email -> folder -> [count, timestamp]."""
+        try:
+            with open(self._folder_cache_file(), 'rb') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return saved if isinstance(saved, dict) else {}
+    
+    def _load_folder_cache(self):
+        """Load this account's saved folder counts, keeping only fresh entries."""
+        try:
+            entries = self._read_folder_cache_file().get(self._folder_cache_key(), {})
+            now = time.time()
+            return {folder: (count, stamp) for folder, (count, stamp) in entries.items()
+                    if now - stamp < self.FOLDER_COUNT_CACHE_TTL}
+        except (TypeError, ValueError, AttributeError):
+            return {}
+    
+    def _save_folder_cache(self):
+        """
+        Persist folder counts so the next session can skip the STATUS round trips.
+        
+        Entries are merged per folder with what other sessions saved, the newer
+        count winning; saved counts older than something this session dropped are
+        discarded rather than revived.
+        """
+        if not self.persist_counts:
+            return
+        
+        try:
+            path = self._folder_cache_file()
+            saved = self._read_folder_cache_file()
+            now = time.time()
+            
+            merged = {}
+            for folder, entry in dict(saved.get(self._folder_cache_key()) or {}).items():
+                try:
+                    count, stamp = entry
+                except (TypeError, ValueError):
+                    continue
+                if (now - stamp < self.FOLDER_COUNT_CACHE_TTL and stamp > self._counts_cleared_at
+                        and stamp > self._counts_forgotten_at.get(folder, 0.0)):
+                    merged[folder] = (count, stamp)
+            for folder, entry in self._folder_cache.items():
+                if folder not in merged or entry[1] >= merged[folder][1]:
+                    merged[folder] = entry
+            saved[self._folder_cache_key()] = merged
+            
+            # Write to a private temporary file and swap it in, so concurrent
+            # connections never leave a half-written cache behind
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(saved, f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logging.debug(f"Could not save folder count cache: {e}")
+    
+    def _check_folder_cache(self):
+        """Forget all cached counts once this connection has changed any mailbox."""
+        if self.connection is not None and getattr(self.connection, 'mailbox_changes', 0):
+            self.connection.mailbox_changes = 0
+            self._folder_cache.clear()
+            self._counts_cleared_at = time.time()
+    
+    def _forget_folder_count(self, folder):
+        """Drop one folder's cached count."""
+        self._folder_cache.pop(folder, None)
+        self._counts_forgotten_at[folder] = time.time()
+    
+    def get_cached_count(self, folder):
+        """
+        Get a recently seen message count for a folder.
+        
+        Returns:
+            int: Cached count, or None if unknown or stale
+        """
+        self._check_folder_cache()
+        entry = self._folder_cache.get(folder)
+        if entry is None or time.time() - entry[1] >= self.FOLDER_COUNT_CACHE_TTL:
+            return None
+        return entry[0]
+    
+    def cache_folder_count(self, folder, count):
+        """Remember a folder's message count as of now."""
+        self._check_folder_cache()
+        self._folder_cache[folder] = (count, time.time())
+    
+    def connect(self, select_inbox=False):
         """
         Establish SSL IMAP connection to Gmail and authenticate.
         
+        No folder is selected unless asked for, since callers normally
+        select_folder() their own choice next.
+        
+        Args:
+            select_inbox (bool): Also SELECT INBOX after logging in
+            
         Returns:
             bool: True if connection successful, False otherwise
         """
         try:
             logging.info(f"Connecting to Gmail IMAP server: {self.server}:{self.port}")
             
-            # Create SSL context for secure connection
-            ssl_context = ssl.create_default_context()
-            
-            # Establish IMAP SSL connection
-            self.connection = imaplib.IMAP4_SSL(self.server, self.port, ssl_context=ssl_context)
+            # Establish IMAP SSL connection (with the shared SSL context)
+            self.connection = PipelinedIMAP4_SSL(self.server, self.port)
+            self._folder_index = None
+            self.folder_listing = None
             
             logging.info("SSL connection established successfully")
             
@@ -47,10 +539,20 @@ class GmailIMAPConnection:
             if result[0] == 'OK':
                 logging.info("Authentication successful")
                 
-                # Initially select INBOX (will be changed later based on user selection)
+                try:
+                    if self.connection.enable_compression():
+                        logging.info("IMAP COMPRESS=DEFLATE enabled")
+                except imaplib.IMAP4.error as e:
+                    logging.warning(f"Could not enable IMAP compression (continuing uncompressed): {e}")
+                
+                if not select_inbox:
+                    return True
+                
                 result = self.connection.select('INBOX')
                 if result[0] == 'OK':
+                    self.selected_folder = 'INBOX'
                     email_count = int(result[1][0])
+                    self.cache_folder_count('INBOX', email_count)
                     logging.info(f"INBOX selected successfully. Total emails: {email_count}")
                     return True
                 else:
@@ -82,21 +584,27 @@ class GmailIMAPConnection:
             logging.info("No active IMAP connection to disconnect")
             return True
         
+        self.folder_listing = None
+        self._check_folder_cache()
+        self._save_folder_cache()
+        
         try:
             logging.info("Disconnecting from Gmail IMAP server")
             
-            # Close the selected mailbox
-            try:
-                self.connection.close()
-                logging.info("Mailbox closed successfully")
-            except imaplib.IMAP4.error as e:
-                logging.warning(f"Error closing mailbox (continuing with logout): {e}")
+            # Close the selected mailbox, if connect() or select_folder() opened one
+            if self.connection.state == 'SELECTED':
+                try:
+                    self.connection.close()
+                    logging.info("Mailbox closed successfully")
+                except imaplib.IMAP4.error as e:
+                    logging.warning(f"Error closing mailbox (continuing with logout): {e}")
             
             # Logout from the server
             self.connection.logout()
             logging.info("Logged out from Gmail IMAP server successfully")
             
             self.connection = None
+            self.selected_folder = None
             return True
             
         except imaplib.IMAP4.error as e:
@@ -117,19 +625,55 @@ class GmailIMAPConnection:
             logging.info("No active connection, attempting to connect")
             return self.connect()
         
+        if time.monotonic() - self.connection.last_response_time < self.KEEPALIVE_INTERVAL:
+            return True
+        
         try:
             # Test the connection with a simple NOOP command
             result = self.connection.noop()
             if result[0] == 'OK':
                 return True
-            else:
-                logging.warning("Connection test failed, attempting to reconnect")
-                self.disconnect()
-                return self.connect()
+            logging.warning("Connection test failed, reselecting the folder")
+        except (imaplib.IMAP4.abort, OSError) as e:
+            logging.warning(f"Connection lost, attempting to reconnect: {e}")
+            return self.reconnect()
+        except imaplib.IMAP4.error as e:
+            logging.warning(f"Connection test error, reselecting the folder: {e}")
+        
+        # The server still answers, so a fresh SELECT can recover its session
+        # state without a new TLS handshake and LOGIN
+        try:
+            folder = self.selected_folder or 'INBOX'
+            if self.connection.select(_quote_mailbox(folder))[0] == 'OK':
+                return True
         except Exception as e:
-            logging.warning(f"Connection test error, attempting to reconnect: {e}")
-            self.disconnect()
-            return self.connect()
+            logging.debug(f"Reselecting after failed NOOP did not help: {e}")
+        
+        logging.warning("Connection unusable, attempting to reconnect")
+        return self.reconnect()
+    
+    def reconnect(self):
+        """
+        Replace a dropped connection with a fresh one and reselect the previous folder.
+        
+        Returns:
+            bool: True if reconnected successfully, False otherwise
+        """
+        folder = self.selected_folder
+        
+        if self.connection is not None:
+            try:
+                self.connection.shutdown()
+            except Exception as e:
+                logging.debug(f"Error shutting down dropped connection: {e}")
+            self.connection = None
+            self.selected_folder = None
+        
+        if not self.connect():
+            return False
+        if folder and folder != self.selected_folder:
+            return self.select_folder(folder)
+        return True
     
     def get_connection(self):
         """
@@ -162,39 +706,129 @@ class GmailIMAPConnection:
         if not self.ensure_connection():
             return False
         
-        # Try the exact folder name first
-        try:
-            result = self.connection.select(folder_name)
-            if result[0] == 'OK':
-                email_count = int(result[1][0])
-                logging.info(f"Selected folder '{folder_name}' successfully. Total emails: {email_count}")
+        # Once the folder list is indexed, a name it lacks goes straight to the server's
+        # name for it rather than first failing a SELECT of its own
+        if self._folder_index is not None and folder_name not in self._folder_index[0]:
+            server_name = self._resolve_folder_name(folder_name)
+            if server_name is not None and self._select_as(server_name, folder_name):
                 return True
+        
+        # Try the exact folder name first (quoted, since Gmail names contain spaces)
+        if self._select_as(folder_name, folder_name):
+            return True
+        
+        # Otherwise look the folder up in one LIST instead of probing each variation
+        server_name = self._resolve_folder_name(folder_name)
+        if server_name is not None and server_name != folder_name:
+            if self._select_as(server_name, folder_name):
+                return True
+        
+        logging.error(f"Failed to select folder '{folder_name}'")
+        return False
+    
+    def _select_as(self, server_name, folder_name):
+        """
+        SELECT a folder by its server name, recording it under the requested name.
+        
+        Returns:
+            bool: True if the server selected it
+        """
+        try:
+            result = self.connection.select(_quote_mailbox(server_name))
         except Exception as e:
-            logging.debug(f"Failed to select '{folder_name}': {e}")
+            logging.debug(f"Failed to select '{server_name}': {e}")
+            return False
+        if result[0] != 'OK':
+            return False
         
-        # If exact name fails, try common variations for Gmail folders
-        folder_variations = {
-            '[Gmail]/All Mail': ['[Google Mail]/All Mail', '"[Gmail]/All Mail"', 'All Mail'],
-            '[Gmail]/Trash': ['[Google Mail]/Bin', '[Gmail]/Bin', '"[Gmail]/Trash"', 'Trash'],
-            '[Gmail]/Spam': ['[Google Mail]/Spam', '"[Gmail]/Spam"', 'Spam'],
-            '[Gmail]/Sent Mail': ['[Google Mail]/Sent Mail', '"[Gmail]/Sent Mail"', 'Sent'],
-            '[Gmail]/Drafts': ['[Google Mail]/Drafts', '"[Gmail]/Drafts"', 'Drafts']
-        }
+        self.selected_folder = folder_name
+        email_count = int(result[1][0])
+        self.cache_folder_count(folder_name, email_count)
+        if server_name == folder_name:
+            logging.info(f"Selected folder '{folder_name}' successfully. Total emails: {email_count}")
+        else:
+            logging.info(f"Selected folder '{server_name}' (requested: '{folder_name}') successfully. Total emails: {email_count}")
+        return True
+    
+    def _resolve_folder_name(self, folder_name):
+        """
+        Find the server's name for a well-known Gmail folder.
         
-        variations_to_try = folder_variations.get(folder_name, [])
+        The special-use flag (RFC 6154) in the LIST response identifies the
+        folder whatever its localized name ([Google Mail]/Bin, ...). Servers
+        without the flags are matched against common alternative names.
         
-        for variation in variations_to_try:
-            try:
-                result = self.connection.select(variation)
-                if result[0] == 'OK':
-                    email_count = int(result[1][0])
-                    logging.info(f"Selected folder '{variation}' (requested: '{folder_name}') successfully. Total emails: {email_count}")
-                    return True
-            except Exception as e:
-                logging.debug(f"Failed to select variation '{variation}': {e}")
+        Returns:
+            str: Folder name as the server lists it, or None if not found
+        """
+        if self._folder_index is None:
+            self._folder_index = self._list_folder_index()
+        names, special_use = self._folder_index
         
-        logging.error(f"Failed to select folder '{folder_name}' and all variations")
-        return False
+        flag = SPECIAL_USE_FLAGS.get(folder_name)
+        if flag is not None and flag in special_use:
+            return special_use[flag]
+        
+        for variation in FOLDER_VARIATIONS.get(folder_name, ()):
+            if variation in names:
+                return variation
+        return None
+    
+    def _list_folder_index(self):
+        """
+        List all folders once and index them.
+        
+        Returns:
+            tuple: (set of folder names, dict of special-use flag -> folder name)
+        """
+        names = set()
+        special_use = {}
+        try:
+            result, folders = self.connection.list()
+            if result != 'OK':
+                logging.debug(f"Failed to list folders: {folders}")
+                return names, special_use
+            
+            for folder in folders:
+                if not isinstance(folder, bytes):
+                    continue
+                name = _list_folder_name(folder)
+                if name is None:
+                    continue
+                names.add(name)
+                flags = folder[folder.find(b'(') + 1:folder.find(b')')].decode().split()
+                for flag in flags:
+                    special_use.setdefault(flag, name)
+        except Exception as e:
+            logging.debug(f"Error listing folders: {e}")
+        return names, special_use
+    
+    def start_idle(self):
+        """
+        Let the connection idle on the selected folder, e.g. while waiting for user input.
+        
+        Returns:
+            bool: True if idling; stop_idle() must be called before the next command
+        """
+        if self.connection is None or self.selected_folder is None:
+            return False
+        try:
+            return self.connection.start_idle()
+        except Exception as e:
+            logging.debug(f"Could not start IDLE: {e}")
+            return False
+    
+    def stop_idle(self):
+        """Leave IDLE, forgetting the selected folder's cached count if it changed."""
+        if self.connection is None:
+            return
+        try:
+            if self.connection.stop_idle():
+                self._forget_folder_count(self.selected_folder)
+        except Exception as e:
+            # Leave it to the next ensure_connection() to notice and reconnect
+            logging.debug(f"Error leaving IDLE: {e}")
+            self.connection.last_response_time = 0
     
     def list_folders(self):
         """
@@ -207,40 +841,24 @@ class GmailIMAPConnection:
             return []
         
         try:
-            result, folders = self.connection.list()
+            folders = self._list_with_counts()
+            if folders is None:
+                result, folders = self.connection.list()
+            else:
+                result = 'OK'
             if result == 'OK':
                 folder_list = []
                 for folder in folders:
-                    # Parse folder name from IMAP response
-                    folder_str = folder.decode('utf-8')
-                    
                     # Gmail IMAP LIST response format: (flags) "delimiter" "folder_name"
                     # Example: (\HasNoChildren) "/" "INBOX"
                     # Example: (\HasNoChildren \All) "/" "[Gmail]/All Mail"
                     
-                    # Find the last quoted string which is the folder name
-                    import re
-                    matches = re.findall(r'"([^"]*)"', folder_str)
-                    if matches:
-                        folder_name = matches[-1]  # Last quoted string is the folder name
+                    folder_name = _list_folder_name(folder)
+                    if folder_name is not None:
                         folder_list.append(folder_name)
-                    else:
-                        # Fallback: try to extract folder name without quotes
-                        parts = folder_str.split()
-                        if len(parts) >= 3:
-                            folder_name = parts[-1]
-                            folder_list.append(folder_name)
                 
                 # Sort folders with INBOX first, then Gmail folders, then others
-                def sort_key(folder):
-                    if folder == 'INBOX':
-                        return (0, folder)
-                    elif folder.startswith('[Gmail]') or folder.startswith('[Google Mail]'):
-                        return (1, folder)
-                    else:
-                        return (2, folder)
-                
-                folder_list.sort(key=sort_key)
+                folder_list.sort(key=_folder_sort_key)
                 return folder_list
             else:
                 logging.error(f"Failed to list folders: {folders}")
@@ -249,6 +867,47 @@ class GmailIMAPConnection:
             logging.error(f"Error listing folders: {e}")
             return []
     
+    def refresh_folder_counts(self):
+        """
+        Re-read every folder's message count into the count cache with one LIST-STATUS command.
+        
+        Returns:
+            bool: True if the server supports LIST-STATUS and answered it
+        """
+        if not self.ensure_connection():
+            return False
+        return self._list_with_counts() is not None
+    
+    def _list_with_counts(self):
+        """
+        List folders with LIST-STATUS (RFC 5819), caching every folder's count on the way.
+        
+        The counts arrive with the listing, so a following get_folders_with_counts()
+        needs no further round trip.
+        
+        Returns:
+            list: LIST response lines, or None if the server lacks LIST-STATUS or it failed
+        """
+        try:
+            if 'LIST-STATUS' not in self.connection.authenticated_capabilities():
+                return None
+            typ, dat = self.connection._simple_command('LIST', '""', '*', 'RETURN', '(STATUS (MESSAGES))')
+            typ, folders = self.connection._untagged_response(typ, dat, 'LIST')
+            _, statuses = self.connection._untagged_response(typ, dat, 'STATUS')
+            if typ != 'OK':
+                logging.debug(f"LIST-STATUS failed: {folders}")
+                return None
+        except Exception as e:
+            logging.debug(f"LIST-STATUS failed, falling back to LIST: {e}")
+            return None
+        
+        for item in statuses:
+            # Literal folder names arrive as tuples; those get counted when asked for
+            status = _status_count(item) if isinstance(item, bytes) else None
+            if status is not None:
+                self.cache_folder_count(*status)
+        return folders
+    
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Context manager exit."""
         self.disconnect()
\ No newline at end of file
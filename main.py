@@ -44,7 +44,7 @@ try:
 except ImportError:
     COLORAMA_AVAILABLE = False
 
-from config import get_user_input, handle_authentication_error, DEFAULT_CONFIG, ask_continue_or_exit
+from config import get_user_input, handle_authentication_error, DEFAULT_CONFIG, ask_continue_or_exit, validate_date_format
 from imap_connection import GmailIMAPConnection
 from email_operations import EmailOperations
 from unsubscribe_processor import UnsubscribeProcessor
@@ -251,6 +251,7 @@ Examples:
     parser.add_argument('--dry-run', action='store_true', help='Perform dry run without actual deletion')
     parser.add_argument('--fast-mode', action='store_true', help='Use fast deletion mode')
     parser.add_argument('--no-unsubscribe', action='store_true', help='Skip unsubscribe processing')
+    parser.add_argument('--unsubscribe-since', help='Only scan emails on or after this date for unsubscribe links (DD-MMM-YYYY)')
     parser.add_argument('--no-styling', action='store_true', help='Disable colored output')
     parser.add_argument('--export-logs', action='store_true', help='Automatically export logs')
     parser.add_argument('--quiet', action='store_true', help='Reduce output verbosity')
@@ -314,11 +315,11 @@ def log_operation_summary(operation_summary):
     print(f"Failed unsubscribes: {operation_summary['failed_unsubscribes']}")
 
 
-def process_unsubscribe_emails(email_ops, unsubscribe_proc):
-    """Process unsubscribe emails and return email IDs."""
+def process_unsubscribe_emails(email_ops, unsubscribe_proc, since=None):
+    """Process unsubscribe emails (optionally only those since a DD-MMM-YYYY date) and return email IDs."""
     print_styled("STARTING UNSUBSCRIBE EMAIL SEARCH", "header")
     
-    unsubscribe_email_ids = email_ops.search_unsubscribe_emails()
+    unsubscribe_email_ids = email_ops.search_unsubscribe_emails(since=since)
     
     if not unsubscribe_email_ids:
         logging.info("No unsubscribe emails found")
@@ -392,15 +393,18 @@ def process_unsubscribe_workflow(email_ids, email_ops, unsubscribe_proc):
     email_ops.operation_summary['successful_unsubscribes'] = request_results['successful_requests']
     email_ops.operation_summary['failed_unsubscribes'] = request_results['failed_requests']
     
+    # Index the emails by the (cleaned) links they contain, first email winning, so each
+    # request is matched with one lookup rather than a scan over every email
+    email_by_link = {}
+    for email_detail in link_results['email_details']:
+        for link in unsubscribe_proc.validate_and_clean_links(email_detail['links']):
+            email_by_link.setdefault(link, email_detail)
+    
     # Prepare unsubscribe data for export
     unsubscribe_data = []
     for detail in request_results['request_details']:
         # Get email info for this link
-        email_info = None
-        for email_detail in link_results['email_details']:
-            if detail['url'] in email_detail['links']:
-                email_info = email_detail
-                break
+        email_info = email_by_link.get(detail['url'])
         
         unsubscribe_data.append({
             'url': detail['url'],
@@ -423,6 +427,10 @@ def main():
     
     print_styled("Gmail IMAP Cleaner - Enhanced Version", "header")
     
+    if args.unsubscribe_since and not validate_date_format(args.unsubscribe_since):
+        print_styled("--unsubscribe-since must be a date in DD-MMM-YYYY format (e.g., 01-Jul-2023)", "error")
+        return False
+    
     # Use command-line arguments if provided, otherwise get user input
     if args.email and args.cutoff:
         config = {
@@ -432,6 +440,7 @@ def main():
             'folders': [args.folder] if args.folder else ['INBOX'],
             'delete_old': True,
             'process_unsubscribe': not args.no_unsubscribe,
+            'unsubscribe_since': args.unsubscribe_since,
             'dry_run': args.dry_run,
             'fast_mode': args.fast_mode
         }
@@ -592,7 +601,7 @@ def main():
                             
                             # Process unsubscribe emails if requested
                             if config['process_unsubscribe']:
-                                unsubscribe_emails = process_unsubscribe_emails(email_ops, unsubscribe_proc)
+                                unsubscribe_emails = process_unsubscribe_emails(email_ops, unsubscribe_proc, config.get('unsubscribe_since'))
                                 
                                 if unsubscribe_emails:
                                     unsubscribed_data = process_unsubscribe_workflow(unsubscribe_emails, email_ops, unsubscribe_proc)
@@ -40,6 +40,7 @@ setup(
     install_requires=requirements,
     extras_require={
         "dev": ["pytest>=6.2.0", "black>=21.0.0", "flake8>=4.0.0"],
+        "async": ["aioimaplib>=1.0.0"],
         "analytics": ["matplotlib>=3.5.0", "plotly>=5.0.0", "pandas>=1.3.0"],
         "gui": ["tkinter-modern>=1.0.0", "PyQt6>=6.0.0"],
         "web": ["flask>=2.0.0", "fastapi>=0.70.0", "uvicorn>=0.15.0"],
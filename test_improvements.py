@@ -5,7 +5,7 @@ Test script to verify the Gmail improvements:
 2. Folder listings show email counts
 """
 
-from email_operations import EmailOperations
+from email_operations import EmailOperations, _compress_to_sequence_set, _parse_imap_list, _text_sections
 
 # Mock IMAP connection for testing
 class MockIMAPConnection:
@@ -68,12 +68,67 @@ def test_source_folders():
     
     print("=" * 40)
 
+def test_sequence_set_compression():
+    """Test that email IDs are coalesced into IMAP sequence-set ranges."""
+    print("\n🔢 Testing Sequence Set Compression:")
+    print("=" * 40)
+    
+    test_cases = [
+        (['1', '2', '3', '4', '7', '8', '9'], ['1:4,7:9']),
+        (['5'], ['5']),
+        (['9', '3', '1', '2'], ['1:3,9']),
+        ([], [])
+    ]
+    
+    for email_ids, expected in test_cases:
+        result = _compress_to_sequence_set(email_ids)
+        status = "✅ PASS" if result == expected else "❌ FAIL"
+        print(f"{status}: {email_ids} -> {result}")
+    
+    print("=" * 40)
+
+def test_body_structure_sections():
+    """Test that BODYSTRUCTURE responses are planned down to their text sections."""
+    print("\n🧩 Testing Body Structure Sections:")
+    print("=" * 40)
+    
+    text_plain = b'("TEXT" "PLAIN" ("CHARSET" "utf-8") NIL NIL "QUOTED-PRINTABLE" 120 4)'
+    text_html = b'("TEXT" "HTML" ("CHARSET" "utf-8") NIL NIL "BASE64" 900 12)'
+    pdf = b'("APPLICATION" "PDF" ("NAME" "a.pdf") NIL NIL "BASE64" 5000 NIL ("ATTACHMENT" ("FILENAME" "a.pdf")) NIL)'
+    rfc822 = (b'("MESSAGE" "RFC822" NIL NIL NIL "7BIT" 300 '
+              b'(NIL "Fwd" NIL NIL NIL NIL NIL NIL NIL NIL) ' + text_plain + b' 10)')
+    
+    test_cases = [
+        ("single part", text_plain, [('1', b'quoted-printable')]),
+        ("nested mixed/alternative",
+         b'((' + text_plain + text_html + b' "ALTERNATIVE") ' + pdf + b' "MIXED")',
+         [('1.2', b'base64')]),
+        ("attachment skipped", b'(' + text_plain + b' ' + pdf + b' "MIXED")', [('1', b'quoted-printable')]),
+        ("message/rfc822 part", b'(' + text_plain + b' ' + rfc822 + b' "MIXED")', [('1', b'quoted-printable')]),
+    ]
+    
+    for name, structure, expected in test_cases:
+        result = _text_sections(_parse_imap_list(structure)[0])
+        status = "✅ PASS" if result == expected else "❌ FAIL"
+        print(f"{status}: {name} -> {result}")
+    
+    for unbalanced in (b'("TEXT" "PLAIN"', b'"TEXT" "PLAIN")'):
+        try:
+            _parse_imap_list(unbalanced)
+            print(f"❌ FAIL: {unbalanced!r} parsed without error")
+        except ValueError:
+            print(f"✅ PASS: {unbalanced!r} -> ValueError")
+    
+    print("=" * 40)
+
 if __name__ == "__main__":
     print("🧪 Testing Gmail IMAP Cleaner Improvements")
     print("=" * 50)
     
     test_all_mail_detection()
     test_source_folders()
+    test_sequence_set_compression()
+    test_body_structure_sections()
     
     print("\n🎉 Test completed!")
     print("\n💡 Key Improvements:")
@@ -57,16 +57,16 @@ def test_folder_counting_performance():
     
     # Test with timeout protection
     start_time = time.time()
-    folder_counts = email_ops.get_folders_with_counts(folders, timeout_per_folder=3)
+    folder_counts = email_ops.get_folders_with_counts(folders)
     end_time = time.time()
     
     print("Results:")
     print("-" * 30)
-    for folder, count in folder_counts.items():
-        if count == -1:
-            print(f"📁 {folder}: ? (timeout/error)")
+    for folder, folder_count in folder_counts.items():
+        if folder_count.count is None:
+            print(f"📁 {folder}: ? ({folder_count.error})")
         else:
-            print(f"📁 {folder}: {count:,} emails")
+            print(f"📁 {folder}: {folder_count.count:,} emails")
     
     print("-" * 30)
     print(f"⏱️  Total time: {end_time - start_time:.1f} seconds")
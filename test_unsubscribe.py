@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test script to verify unsubscribe link cleanup:
+1. Tracking parameters are removed
+2. Everything else in the link is kept exactly as sent
+"""
+
+from unsubscribe_processor import _clean_unsubscribe_link
+
+
+def test_clean_unsubscribe_link():
+    """Test that only tracking parameters are stripped from unsubscribe links."""
+    print("\n🔗 Testing Unsubscribe Link Cleanup:")
+    print("=" * 40)
+    
+    test_cases = [
+        # No query string
+        ('https://example.com/unsubscribe', 'https://example.com/unsubscribe'),
+        # Trailing whitespace
+        ('https://example.com/unsubscribe?id=7\n', 'https://example.com/unsubscribe?id=7'),
+        # Only tracking parameters, so the query goes away entirely
+        ('https://example.com/unsubscribe?utm_source=news&fbclid=abc', 'https://example.com/unsubscribe'),
+        # Fragment survives
+        ('https://example.com/unsubscribe?id=5&utm_medium=email#confirm',
+         'https://example.com/unsubscribe?id=5#confirm'),
+        # Parameter with no value survives
+        ('https://example.com/unsubscribe?token&utm_campaign=spring', 'https://example.com/unsubscribe?token'),
+        # Kept values stay percent-encoded as sent
+        ('https://example.com/unsubscribe?next=%2Fhome%2Fprefs&gclid=xyz',
+         'https://example.com/unsubscribe?next=%2Fhome%2Fprefs'),
+        # Encoded tracking parameter names are still recognised
+        ('https://example.com/unsubscribe?utm%5Fsource=x&u=1', 'https://example.com/unsubscribe?u=1'),
+        # Invalid links are rejected
+        ('ftp://example.com/unsubscribe', None),
+        ('https://example.com/preferences', None),
+    ]
+    
+    for link, expected in test_cases:
+        result = _clean_unsubscribe_link(link)
+        status = "✅ PASS" if result == expected else "❌ FAIL"
+        print(f"{status}: {link.strip()} -> {result}")
+    
+    print("=" * 40)
+
+
+if __name__ == "__main__":
+    print("🧪 Testing Unsubscribe Processing")
+    print("=" * 50)
+    
+    test_clean_unsubscribe_link()
+    
+    print("\n🎉 Test completed!")
@@ -5,10 +5,92 @@ Unsubscribe Processing Module for Gmail IMAP Cleaner
 Handles unsubscribe link extraction and HTTP request processing.
 """
 
+import functools
+import hashlib
 import re
 import time
 import logging
+from collections import Counter, OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote_plus, urlsplit, urlunsplit
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Optional RE2 engine (pip install google-re2): linear-time matching, where re can
+# backtrack quadratically over long link-like runs that never contain the keyword
+try:
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
+
+# Unsubscribe URLs in email text; the inline flag works in both engines
+_UNSUBSCRIBE_URL_PATTERN = r'(?i)https?://[^\s<>"]+unsubscribe[^\s<>"]*'
+_UNSUBSCRIBE_URL_RE = (re2 if RE2_AVAILABLE else re).compile(_UNSUBSCRIBE_URL_PATTERN)
+
+# Schemes that must never appear anywhere in a link we request (matched lower-cased)
+_SUSPICIOUS_SCHEME_RE = re.compile(r'javascript:|data:|file:|ftp:')
+
+# Query parameters stripped from links before they are requested (analytics and ad-click
+# ids only; recipient ids such as Mailchimp's mc_eid may be what the unsubscribe needs)
+TRACKING_PARAMS = frozenset({
+    'utm_source', 'utm_medium', 'utm_campaign', 'utm_content', 'utm_term', 'utm_id',
+    'gclid', 'fbclid',
+})
+
+
+# Text lower-cased at a time when looking for the keyword, so a large HTML body is
+# never copied whole
+_SCAN_WINDOW = 64 * 1024
+
+
+def _mentions_unsubscribe(text):
+    """Case-insensitive check for the word 'unsubscribe', one window of text at a time."""
+    overlap = len('unsubscribe') - 1
+    for start in range(0, len(text), _SCAN_WINDOW):
+        if 'unsubscribe' in text[start:start + _SCAN_WINDOW + overlap].lower():
+            return True
+    return False
+
+
+# The same links recur across every email from a sender
+@functools.lru_cache(maxsize=4096)
+def _is_valid_unsubscribe_url(url):
+    """Check that a URL is an http(s) unsubscribe link with no embedded dangerous scheme."""
+    if not url or len(url) < 10:
+        return False
+    
+    lowered = url.lower()
+    if not lowered.startswith(('http://', 'https://')):
+        return False
+    
+    if 'unsubscribe' not in lowered:
+        return False
+    
+    # Checked anywhere in the URL, which catches redirects to javascript: and the like
+    if _SUSPICIOUS_SCHEME_RE.search(lowered):
+        return False
+    
+    return True
+
+
+@functools.lru_cache(maxsize=8192)
+def _clean_unsubscribe_link(link):
+    """Strip whitespace and tracking parameters from a valid unsubscribe link, or return None."""
+    if not _is_valid_unsubscribe_url(link):
+        return None
+    
+    parts = urlsplit(link.strip())
+    if not parts.query:
+        return urlunsplit(parts)
+    
+    # Remove common tracking parameters. Kept parameters stay exactly as sent, since
+    # re-encoding them could break signed unsubscribe tokens.
+    kept_params = [param for param in parts.query.split('&')
+                   if param and unquote_plus(param.split('=', 1)[0]) not in TRACKING_PARAMS]
+    return urlunsplit(parts._replace(query='&'.join(kept_params)))
 
 
 class UnsubscribeProcessor:
@@ -16,29 +98,78 @@ class UnsubscribeProcessor:
     Unsubscribe link processor for extraction and HTTP request handling.
     """
     
-    def __init__(self, email_operations, request_delay=1, http_timeout=10):
+    DEFAULT_HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.5',
+        'Accept-Encoding': 'gzip, deflate',
+        'Connection': 'keep-alive',
+        'Upgrade-Insecure-Requests': '1',
+    }
+    
+    # Largest response body read to the end so its connection can be reused
+    MAX_DRAINED_BODY = 64 * 1024
+    
+    def __init__(self, email_operations, request_delay=1, http_timeout=10, link_cache_size=2048):
         self.email_operations = email_operations
         self.request_delay = request_delay
         self.http_timeout = http_timeout
-        self.unsubscribe_regex = r'https?://[^\s<>"]+unsubscribe[^\s<>"]*'
+        self.max_links_per_email = 50
+        # Extracted links of recently scanned content, keyed by its digest (LRU; 0 disables)
+        self.link_cache_size = link_cache_size
+        self._link_cache = OrderedDict()
+        
+        # One session for all requests, so connections (and TLS sessions) to a host are reused
+        self._session = requests.Session()
+        self._session.headers.update(self.DEFAULT_HEADERS)
+        # Transient gateway errors get two retries; the final status is still reported
+        retries = Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504], raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=retries)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+    
+    def close(self):
+        """Close the pooled HTTP connections."""
+        self._session.close()
     
     def extract_unsubscribe_links(self, email_content):
-        """Extract unsubscribe URLs from email content using regex."""
+        """
+        Extract unsubscribe URLs from email content (a string or an iterable of text parts) using regex.
+        
+        Results are cached by a digest of the text, so content seen again in this
+        session (a repeated unsubscribe pass) is not rescanned.
+        """
         if not email_content:
             return []
         
+        if isinstance(email_content, str):
+            email_content = (email_content,)
+        
         try:
-            matches = re.findall(self.unsubscribe_regex, email_content, re.IGNORECASE)
+            # Most parts have no link at all; a substring test rejects them far
+            # faster than the URL regex (or a case-insensitive regex) can
+            texts = [text for text in email_content if _mentions_unsubscribe(text)]
+            if not texts:
+                return []
             
-            unique_links = []
-            seen_links = set()
+            cache_key = None
+            if self.link_cache_size:
+                digest = hashlib.blake2b(digest_size=16)
+                for text in texts:
+                    digest.update(text.encode('utf-8', 'surrogatepass'))
+                    digest.update(b'\0')
+                cache_key = digest.digest()
+                cached_links = self._link_cache.get(cache_key)
+                if cached_links is not None:
+                    self._link_cache.move_to_end(cache_key)
+                    return list(cached_links)
             
-            for match in matches:
-                cleaned_url = match.rstrip('.,;!?)')
-                
-                if self.is_valid_unsubscribe_url(cleaned_url) and cleaned_url not in seen_links:
-                    unique_links.append(cleaned_url)
-                    seen_links.add(cleaned_url)
+            unique_links = self._scan_for_links(texts)
+            
+            if cache_key is not None:
+                self._link_cache[cache_key] = tuple(unique_links)
+                if len(self._link_cache) > self.link_cache_size:
+                    self._link_cache.popitem(last=False)
             
             return unique_links
             
@@ -46,33 +177,46 @@ class UnsubscribeProcessor:
             logging.warning(f"Error extracting unsubscribe links: {e}")
             return []
     
-    def is_valid_unsubscribe_url(self, url):
-        """Validate that a URL is a proper unsubscribe link."""
-        if not url or len(url) < 10:
-            return False
+    def _scan_for_links(self, texts):
+        """Find the distinct valid unsubscribe URLs in some text parts, up to max_links_per_email."""
+        unique_links = []
+        seen_links = set()
         
-        if not url.lower().startswith(('http://', 'https://')):
-            return False
-        
-        if 'unsubscribe' not in url.lower():
-            return False
-        
-        suspicious_patterns = ['javascript:', 'data:', 'file:', 'ftp:']
-        if any(pattern in url.lower() for pattern in suspicious_patterns):
-            return False
+        # Scan part by part so the parts are never joined into one string, and match
+        # by match so no list of every match is built
+        for text in texts:
+            for match in _UNSUBSCRIBE_URL_RE.finditer(text):
+                cleaned_url = match.group(0).rstrip('.,;!?)')
+                
+                if cleaned_url in seen_links or not self.is_valid_unsubscribe_url(cleaned_url):
+                    continue
+                unique_links.append(cleaned_url)
+                seen_links.add(cleaned_url)
+                if len(unique_links) >= self.max_links_per_email:
+                    return unique_links
         
-        return True
+        return unique_links
     
-    def extract_links_from_email(self, email_id):
-        """Extract unsubscribe links from a specific email."""
-        metadata = self.email_operations.get_email_metadata(email_id)
+    def is_valid_unsubscribe_url(self, url):
+        """Validate that a URL is a proper unsubscribe link."""
+        return _is_valid_unsubscribe_url(url)
+    
+    def extract_links_from_email(self, email_id, metadata=None, content=None):
+        """
+        Extract unsubscribe links from a specific email, fetching whatever was not prefetched.
+        
+        content may be a string or a list of decoded text parts.
+        """
+        if metadata is None:
+            metadata = self.email_operations.get_email_metadata(email_id)
         if not metadata:
             logging.warning(f"Could not get metadata for email {email_id}")
             return None
         
-        content = self.email_operations.get_email_content(email_id)
+        if content is None:
+            content = list(self.email_operations.iter_email_text_parts(email_id))
         if not content:
-            logging.warning(f"Could not get content for email {email_id}")
+            logging.debug(f"No text content to scan for email {email_id}")
             return {
                 'email_id': email_id,
                 'subject': metadata.get('subject', 'Unknown'),
@@ -87,7 +231,7 @@ class UnsubscribeProcessor:
             'subject': metadata.get('subject', 'Unknown'),
             'from': metadata.get('from', 'Unknown'),
             'links': links,
-            'content_length': len(content)
+            'content_length': len(content) if isinstance(content, str) else sum(map(len, content))
         }
     
     def process_unsubscribe_links(self, email_ids):
@@ -106,9 +250,13 @@ class UnsubscribeProcessor:
         
         logging.info(f"Extracting unsubscribe links from {len(email_ids)} emails...")
         
-        for email_id in email_ids:
+        # Headers and bodies are fetched in bulk rather than one round trip per email
+        metadata_by_id = self.email_operations.get_email_metadata_batch(email_ids)
+        
+        # Unsubscribe URLs contain the word itself, so parts without it are never decoded
+        for email_id, content in self.email_operations.get_email_text_parts_bulk(email_ids, keyword=b'unsubscribe'):
             try:
-                email_data = self.extract_links_from_email(email_id)
+                email_data = self.extract_links_from_email(email_id, metadata_by_id.get(email_id), content)
                 
                 if email_data:
                     results['emails_processed'] += 1
@@ -117,12 +265,13 @@ class UnsubscribeProcessor:
                         results['emails_with_links'] += 1
                         results['total_links_found'] += len(email_data['links'])
                         
-                        for link in email_data['links']:
-                            results['unique_links'].add(link)
+                        results['unique_links'].update(email_data['links'])
                         
-                        logging.info(f"Email '{email_data['subject'][:50]}...' from {email_data['from']}: {len(email_data['links'])} links")
-                        for link in email_data['links']:
-                            logging.info(f"  → {link}")
+                        # Per-email lines; skip building them at all when INFO is off
+                        if logging.getLogger().isEnabledFor(logging.INFO):
+                            logging.info(f"Email '{email_data['subject'][:50]}...' from {email_data['from']}: {len(email_data['links'])} links")
+                            for link in email_data['links']:
+                                logging.info(f"  → {link}")
                     else:
                         logging.debug(f"No unsubscribe links found in email {email_id}")
                     
@@ -131,7 +280,8 @@ class UnsubscribeProcessor:
             except Exception as e:
                 logging.error(f"Error processing email {email_id} for links: {e}")
         
-        results['unique_links'] = list(results['unique_links'])
+        # Callers slice and index it; sorting keeps the confirmation listing stable between runs
+        results['unique_links'] = sorted(results['unique_links'])
         
         logging.info(f"Link extraction completed:")
         logging.info(f"  Emails processed: {results['emails_processed']}")
@@ -142,7 +292,7 @@ class UnsubscribeProcessor:
         return results
     
     def send_unsubscribe_request(self, url):
-        """Send a GET request to an unsubscribe URL."""
+        """Send a GET request to an unsubscribe URL, reading little or none of the response body."""
         result = {
             'url': url,
             'success': False,
@@ -154,22 +304,15 @@ class UnsubscribeProcessor:
         try:
             start_time = time.time()
             
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.5',
-                'Accept-Encoding': 'gzip, deflate',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-            }
-            
-            response = requests.get(
+            # Only the status matters, so the body is streamed rather than downloaded
+            response = self._session.get(
                 url, 
-                headers=headers, 
                 timeout=self.http_timeout,
                 allow_redirects=True,
-                verify=True
+                verify=True,
+                stream=True
             )
+            self._discard_body(response)
             
             end_time = time.time()
             result['response_time'] = round(end_time - start_time, 2)
@@ -200,14 +343,35 @@ class UnsubscribeProcessor:
         
         return result
     
-    def send_unsubscribe_requests_batch(self, urls):
-        """Send unsubscribe requests to multiple URLs with rate limiting."""
+    def _discard_body(self, response):
+        """
+        Finish with a streamed response without downloading a large body.
+        
+        Small bodies are read so the connection goes back to the pool; anything
+        larger or of unknown length is dropped along with its connection.
+        """
+        length = response.headers.get('Content-Length', '')
+        try:
+            if length.isdigit() and int(length) <= self.MAX_DRAINED_BODY:
+                response.content
+        except requests.exceptions.RequestException as e:
+            logging.debug(f"Error reading response body from {response.url}: {e}")
+        finally:
+            response.close()
+    
+    def send_unsubscribe_requests_batch(self, urls, concurrency=10):
+        """
+        Send unsubscribe requests to multiple URLs with per-host rate limiting.
+        
+        Requests to the same host go out one at a time with request_delay between
+        them; up to concurrency hosts are contacted in parallel.
+        """
         results = {
             'total_requests': len(urls),
             'successful_requests': 0,
             'failed_requests': 0,
             'request_details': [],
-            'errors': {}
+            'errors': Counter()
         }
         
         if not urls:
@@ -215,12 +379,32 @@ class UnsubscribeProcessor:
             return results
         
         logging.info(f"Sending unsubscribe requests to {len(urls)} URLs...")
-        logging.info(f"Request delay: {self.request_delay} seconds between requests")
+        logging.info(f"Request delay: {self.request_delay} seconds between requests to the same host")
         
-        for i, url in enumerate(urls, 1):
-            logging.info(f"Processing unsubscribe request {i}/{len(urls)}: {url}")
-            
-            request_result = self.send_unsubscribe_request(url)
+        urls_by_host = defaultdict(list)
+        for index, url in enumerate(urls):
+            urls_by_host[urlsplit(url).netloc.lower()].append((index, url))
+        
+        request_results = [None] * len(urls)
+        
+        def send_to_host(host_urls):
+            # The delay runs from the start of the previous request, so a slow
+            # response counts towards it
+            next_allowed = time.monotonic()
+            for index, url in host_urls:
+                wait = next_allowed - time.monotonic()
+                if wait > 0:
+                    logging.debug(f"Waiting {wait:.2f} seconds before next request to this host...")
+                    time.sleep(wait)
+                next_allowed = time.monotonic() + self.request_delay
+                logging.info(f"Processing unsubscribe request {index + 1}/{len(urls)}: {url}")
+                request_results[index] = self.send_unsubscribe_request(url)
+        
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(urls_by_host))) as executor:
+            # list() waits for every host and re-raises anything a worker raised
+            list(executor.map(send_to_host, urls_by_host.values()))
+        
+        for request_result in request_results:
             results['request_details'].append(request_result)
             
             if request_result['success']:
@@ -228,14 +412,7 @@ class UnsubscribeProcessor:
             else:
                 results['failed_requests'] += 1
                 
-                error_type = request_result['error'] or 'Unknown error'
-                if error_type not in results['errors']:
-                    results['errors'][error_type] = 0
-                results['errors'][error_type] += 1
-            
-            if i < len(urls):
-                logging.debug(f"Waiting {self.request_delay} seconds before next request...")
-                time.sleep(self.request_delay)
+                results['errors'][request_result['error'] or 'Unknown error'] += 1
         
         logging.info("=" * 50)
         logging.info("UNSUBSCRIBE REQUEST SUMMARY")
@@ -246,7 +423,7 @@ class UnsubscribeProcessor:
         
         if results['errors']:
             logging.info("Error breakdown:")
-            for error_type, count in results['errors'].items():
+            for error_type, count in results['errors'].most_common():
                 logging.info(f"  {error_type}: {count}")
         
         logging.info("=" * 50)
@@ -271,7 +448,7 @@ class UnsubscribeProcessor:
         
         print("\nWARNING: This will send HTTP GET requests to these URLs.")
         print("This action cannot be undone.")
-        print(f"Requests will be sent with {self.request_delay} second delays between them.")
+        print(f"Requests to the same site will be sent with {self.request_delay} second delays between them.")
         
         while True:
             response = input("\nProceed with sending unsubscribe requests? (y/n): ").lower().strip()
@@ -287,30 +464,10 @@ class UnsubscribeProcessor:
         cleaned_links = []
         
         for link in links:
-            if self.is_valid_unsubscribe_url(link):
-                cleaned_link = link.strip()
-                
-                # Remove common tracking parameters
-                tracking_params = ['utm_source', 'utm_medium', 'utm_campaign', 'utm_content', 'utm_term']
-                
-                if '?' in cleaned_link:
-                    base_url, params = cleaned_link.split('?', 1)
-                    param_pairs = params.split('&')
-                    filtered_params = []
-                    
-                    for param in param_pairs:
-                        if '=' in param:
-                            param_name = param.split('=')[0]
-                            if param_name not in tracking_params:
-                                filtered_params.append(param)
-                    
-                    if filtered_params:
-                        cleaned_link = base_url + '?' + '&'.join(filtered_params)
-                    else:
-                        cleaned_link = base_url
-                
+            cleaned_link = _clean_unsubscribe_link(link)
+            if cleaned_link is not None:
                 cleaned_links.append(cleaned_link)
             else:
                 logging.warning(f"Invalid unsubscribe URL filtered out: {link}")
         
-        return cleaned_links
\ No newline at end of file
+        return cleaned_links